@@ -1,9 +1,17 @@
 import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+import anyio
+import msgspec
 import uvicorn
+from redis.asyncio import Redis
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Dict
-from database_manager import DatabaseManager
+from database_manager import DatabaseManager, TABLE_NAME
+from db_pool import close_db_pool, get_db_pool
 from report_generator import ReportGenerator
 from config import settings
 from logging_config import configure_logging
@@ -15,8 +23,31 @@ configure_logging()
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Size of the AnyIO worker thread pool used for blocking calls
+THREAD_POOL_SIZE = 100
+
+# SoH status cache settings
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+SOH_CACHE_TTL = 30  # seconds
+
+# Opened in the lifespan handler
+redis_client: Optional[Redis] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_client
+    # Blocking database calls run on AnyIO's thread pool; the default of 40
+    # tokens caps per-process concurrency
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    await get_db_pool(database_manager.db_name)
+    redis_client = Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False)
+    yield
+    await redis_client.aclose()
+    await close_db_pool()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Initialize database manager
 database_manager = DatabaseManager()
@@ -25,13 +56,13 @@ database_manager = DatabaseManager()
 report_generator = ReportGenerator()
 
 # Define request and response models
-class SoHStatusRequest(BaseModel):
-    battery_id: str
-
-class SoHStatusResponse(BaseModel):
+class SoHStatusResponse(msgspec.Struct):
     battery_id: str
     soh_status: float
 
+# Encodes SoHStatusResponse straight to JSON bytes
+soh_status_encoder = msgspec.json.Encoder()
+
 class TriggerMeasurementRequest(BaseModel):
     battery_id: str
 
@@ -64,51 +95,92 @@ class QueryDegradationModesException(Exception):
     pass
 
 # Define helper functions
-def get_soh_status(battery_id: str) -> float:
+def soh_cache_key(battery_id: str) -> str:
+    return f"soh:{battery_id}"
+
+# The SoH cache is best-effort: a Redis failure is logged and the database answers instead
+async def get_cached_soh_status(battery_id: str) -> Optional[float]:
+    try:
+        cached = await redis_client.get(soh_cache_key(battery_id))
+    except Exception as e:
+        logger.warning("Error reading SoH status cache: %s", e)
+        return None
+    return None if cached is None else float(cached)
+
+async def cache_soh_status(battery_id: str, soh_status: float) -> None:
+    try:
+        await redis_client.setex(soh_cache_key(battery_id), SOH_CACHE_TTL, str(soh_status))
+    except Exception as e:
+        logger.warning("Error writing SoH status cache: %s", e)
+
+async def invalidate_soh_status(battery_id: str) -> None:
+    try:
+        await redis_client.delete(soh_cache_key(battery_id))
+    except Exception as e:
+        logger.warning("Error invalidating SoH status cache: %s", e)
+
+async def read_latest_soh() -> float:
+    # Reads through the aiosqlite pool opened in lifespan. Measurements are not
+    # keyed by battery yet, so this is the latest SOH stored for any battery
+    pool = await get_db_pool(database_manager.db_name)
+    async with pool.acquire() as conn:
+        async with conn.execute(f'SELECT soh FROM {TABLE_NAME} ORDER BY timestamp DESC LIMIT 1') as cursor:
+            row = await cursor.fetchone()
+    if row is None:
+        raise LookupError('No SOH measurements stored')
+    return row[0]
+
+async def get_soh_status(battery_id: str) -> float:
+    cached = await get_cached_soh_status(battery_id)
+    if cached is not None:
+        return cached
     try:
-        soh_status = database_manager.get_soh_status(battery_id)
-        return soh_status
+        soh_status = await read_latest_soh()
     except Exception as e:
-        logger.error(f"Error getting SoH status: {e}")
+        logger.error("Error getting SoH status: %s", e)
         raise SoHStatusException("Error getting SoH status")
+    await cache_soh_status(battery_id, soh_status)
+    return soh_status
 
-def trigger_measurement(battery_id: str) -> str:
+async def trigger_measurement(battery_id: str) -> str:
     try:
-        measurement_id = database_manager.trigger_measurement(battery_id)
-        return measurement_id
+        measurement_id = await anyio.to_thread.run_sync(database_manager.trigger_measurement, battery_id)
     except Exception as e:
-        logger.error(f"Error triggering measurement: {e}")
+        logger.error("Error triggering measurement: %s", e)
         raise TriggerMeasurementException("Error triggering measurement")
+    await invalidate_soh_status(battery_id)
+    return measurement_id
 
-def download_reports(battery_id: str) -> List[str]:
+async def download_reports(battery_id: str) -> List[str]:
     try:
-        reports = report_generator.generate_reports(battery_id)
+        reports = await anyio.to_thread.run_sync(report_generator.generate_reports, battery_id)
         return reports
     except Exception as e:
-        logger.error(f"Error downloading reports: {e}")
+        logger.error("Error downloading reports: %s", e)
         raise DownloadReportsException("Error downloading reports")
 
-def query_degradation_modes(battery_id: str) -> List[str]:
+async def query_degradation_modes(battery_id: str) -> List[str]:
     try:
-        degradation_modes = database_manager.query_degradation_modes(battery_id)
+        degradation_modes = await anyio.to_thread.run_sync(database_manager.query_degradation_modes, battery_id)
         return degradation_modes
     except Exception as e:
-        logger.error(f"Error querying degradation modes: {e}")
+        logger.error("Error querying degradation modes: %s", e)
         raise QueryDegradationModesException("Error querying degradation modes")
 
 # Define API endpoints
-@app.get("/soh_status", response_model=SoHStatusResponse)
-async def get_soh_status_endpoint(request: SoHStatusRequest):
+@app.get("/soh_status")
+async def get_soh_status_endpoint(battery_id: str):
     try:
-        soh_status = get_soh_status(request.battery_id)
-        return SoHStatusResponse(battery_id=request.battery_id, soh_status=soh_status)
+        soh_status = await get_soh_status(battery_id)
+        response = SoHStatusResponse(battery_id=battery_id, soh_status=soh_status)
+        return Response(soh_status_encoder.encode(response), media_type="application/json")
     except SoHStatusException as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/trigger_measurement", response_model=TriggerMeasurementResponse)
 async def trigger_measurement_endpoint(request: TriggerMeasurementRequest):
     try:
-        measurement_id = trigger_measurement(request.battery_id)
+        measurement_id = await trigger_measurement(request.battery_id)
         return TriggerMeasurementResponse(measurement_id=measurement_id)
     except TriggerMeasurementException as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -116,19 +188,30 @@ async def trigger_measurement_endpoint(request: TriggerMeasurementRequest):
 @app.post("/download_reports", response_model=DownloadReportsResponse)
 async def download_reports_endpoint(request: DownloadReportsRequest):
     try:
-        reports = download_reports(request.battery_id)
-        return DownloadReportsResponse(reports=reports)
+        reports = await download_reports(request.battery_id)
+        # Skip response-model re-validation for the list payload
+        return ORJSONResponse({"reports": reports})
     except DownloadReportsException as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/query_degradation_modes", response_model=QueryDegradationModesResponse)
 async def query_degradation_modes_endpoint(request: QueryDegradationModesRequest):
     try:
-        degradation_modes = query_degradation_modes(request.battery_id)
-        return QueryDegradationModesResponse(degradation_modes=degradation_modes)
+        degradation_modes = await query_degradation_modes(request.battery_id)
+        # Skip response-model re-validation for the list payload
+        return ORJSONResponse({"degradation_modes": degradation_modes})
     except QueryDegradationModesException as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Run the app
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Workers require the app as an import string; uvloop has no Windows build
+    uvicorn.run(
+        "api_server:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="winloop:new_event_loop" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "4")),
+        log_level="warning",
+    )
\ No newline at end of file
@@ -3,21 +3,39 @@ import logging
 import sys
 from typing import Dict, List
 
-import config_handler
-import main_soh_analyzer
-from config_handler import ConfigHandler
-from main_soh_analyzer import MainSOHAnalyzer
-from soh_calculator import SOHCalculator
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class CLIInterface:
     def __init__(self):
-        self.config_handler = ConfigHandler()
-        self.main_soh_analyzer = MainSOHAnalyzer()
-        self.soh_calculator = SOHCalculator()
+        # The analysis modules pull in numpy/pandas and the vehicle I/O stack,
+        # so they are imported on first use rather than at startup
+        self._config_handler = None
+        self._main_soh_analyzer = None
+        self._soh_calculator = None
+
+    @property
+    def config_handler(self):
+        """The configuration handler, created on first use."""
+        if self._config_handler is None:
+            from config_handler import ConfigHandler
+            self._config_handler = ConfigHandler()
+        return self._config_handler
+
+    @property
+    def main_soh_analyzer(self):
+        """The SOH analysis pipeline, created on first use."""
+        if self._main_soh_analyzer is None:
+            from main_soh_analyzer import MainSOHAnalyzer
+            self._main_soh_analyzer = MainSOHAnalyzer()
+        return self._main_soh_analyzer
+
+    @property
+    def soh_calculator(self):
+        """The SOH calculator, created on first use."""
+        if self._soh_calculator is None:
+            from soh_calculator import SOHCalculator
+            self._soh_calculator = SOHCalculator()
+        return self._soh_calculator
 
     def parse_arguments(self) -> argparse.Namespace:
         """Parse command-line arguments."""
@@ -64,7 +82,7 @@ class CLIInterface:
                 f.write(self.main_soh_analyzer.get_raw_data())
             print(f'Raw data saved to {data_path}')
         except Exception as e:
-            logger.error(f'Error exporting raw data: {e}')
+            logger.error('Error exporting raw data: %s', e)
 
     def run(self) -> None:
         """Run the CLI interface."""
@@ -80,6 +98,7 @@ class CLIInterface:
                 self.export_raw_data(args.results)
 
 def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     cli_interface = CLIInterface()
     cli_interface.run()
 
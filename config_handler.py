@@ -1,15 +1,24 @@
 import os
 import json
 import logging
+import orjson
 import yaml
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 from enum import Enum
 from threading import Lock
+from logging_config import queue_handler
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
 
 # Define constants and configuration
 CONFIG_FILE = 'vehicle_config.yaml'
 PARAMETERS_FILE = 'measurement_parameters.json'
 REFERENCE_VALUES_FILE = 'reference_values.json'
+# Matches json.dump's handling of non-string keys
+JSON_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
 # Define logger
 logger = logging.getLogger(__name__)
@@ -23,8 +32,11 @@ file_handler.setLevel(logging.DEBUG)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 
-# Add the file handler to the logger
-logger.addHandler(file_handler)
+# Add the file handler to the logger behind a queue so log sites don't block on disk
+logger.addHandler(queue_handler(file_handler))
+
+def _parse_yaml(data: bytes) -> Any:
+    return yaml.load(data, Loader=SafeLoader)
 
 class ConfigError(Exception):
     """Base class for configuration-related exceptions."""
@@ -52,7 +64,30 @@ class ConfigHandler:
         self.config = None
         self.parameters = None
         self.reference_values = None
+        # Serializes writers only; readers take the current reference lock-free
         self.lock = Lock()
+        # Parsed file contents keyed by path, as (mtime_ns, parsed)
+        self._cache: Dict[str, Tuple[int, Any]] = {}
+
+    def _load_cached(self, path: str, parse: Callable[[bytes], Any]) -> Any:
+        """
+        Parses a file, reusing the previous result while its mtime is unchanged.
+
+        Args:
+        - path (str): The path to the file.
+        - parse (Callable[[bytes], Any]): Parses the raw file contents.
+
+        Returns:
+        - The parsed file contents.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'rb') as file:
+            parsed = parse(file.read())
+        self._cache[path] = (mtime, parsed)
+        return parsed
 
     def load_vehicle_config(self) -> Dict:
         """
@@ -65,14 +100,13 @@ class ConfigHandler:
         - InvalidConfigError: If the configuration file is invalid.
         """
         try:
-            with self.lock:
-                with open(self.config_file, 'r') as file:
-                    self.config = yaml.safe_load(file)
-                    if not self.config:
-                        raise InvalidConfigError("Invalid configuration file")
-                    return self.config
+            config = self._load_cached(self.config_file, _parse_yaml)
+            if not config:
+                raise InvalidConfigError("Invalid configuration file")
+            self.config = config
+            return config
         except yaml.YAMLError as e:
-            logger.error(f"Failed to load configuration: {e}")
+            logger.error("Failed to load configuration: %s", e)
             raise InvalidConfigError("Invalid configuration file")
 
     def validate_parameters(self, parameters: Dict) -> bool:
@@ -88,7 +122,7 @@ class ConfigHandler:
         required_keys = ['voltage_range', 'current_range', 'temperature_range']
         for key in required_keys:
             if key not in parameters:
-                logger.error(f"Missing required parameter: {key}")
+                logger.error("Missing required parameter: %s", key)
                 return False
         return True
 
@@ -101,13 +135,16 @@ class ConfigHandler:
         """
         try:
             with self.lock:
-                if not self.parameters:
-                    self.load_parameters()
-                self.parameters['voltage_range'] = voltage_ranges
-                with open(self.parameters_file, 'w') as file:
-                    json.dump(self.parameters, file)
+                parameters = self.parameters or self.load_parameters()
+                # Publish a new dict rather than mutating the one readers may hold
+                new_parameters = {**parameters, 'voltage_range': voltage_ranges}
+                with open(self.parameters_file, 'wb') as file:
+                    file.write(orjson.dumps(new_parameters, option=JSON_DUMP_OPTIONS))
+                # A rewrite within one mtime tick would otherwise serve the old parse
+                self._cache.pop(self.parameters_file, None)
+                self.parameters = new_parameters
         except Exception as e:
-            logger.error(f"Failed to update voltage ranges: {e}")
+            logger.error("Failed to update voltage ranges: %s", e)
 
     def store_reference_values(self, reference_values: Dict) -> None:
         """
@@ -118,10 +155,11 @@ class ConfigHandler:
         """
         try:
             with self.lock:
-                with open(self.reference_values_file, 'w') as file:
-                    json.dump(reference_values, file)
+                with open(self.reference_values_file, 'wb') as file:
+                    file.write(orjson.dumps(reference_values, option=JSON_DUMP_OPTIONS))
+                self._cache.pop(self.reference_values_file, None)
         except Exception as e:
-            logger.error(f"Failed to store reference values: {e}")
+            logger.error("Failed to store reference values: %s", e)
 
     def load_parameters(self) -> Dict:
         """
@@ -134,14 +172,13 @@ class ConfigHandler:
         - InvalidConfigError: If the parameters file is invalid.
         """
         try:
-            with self.lock:
-                with open(self.parameters_file, 'r') as file:
-                    self.parameters = json.load(file)
-                    if not self.parameters:
-                        raise InvalidConfigError("Invalid parameters file")
-                    return self.parameters
+            parameters = self._load_cached(self.parameters_file, orjson.loads)
+            if not parameters:
+                raise InvalidConfigError("Invalid parameters file")
+            self.parameters = parameters
+            return parameters
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to load parameters: {e}")
+            logger.error("Failed to load parameters: %s", e)
             raise InvalidConfigError("Invalid parameters file")
 
     def get_reference_values(self) -> Dict:
@@ -155,14 +192,13 @@ class ConfigHandler:
         - InvalidConfigError: If the reference values file is invalid.
         """
         try:
-            with self.lock:
-                with open(self.reference_values_file, 'r') as file:
-                    self.reference_values = json.load(file)
-                    if not self.reference_values:
-                        raise InvalidConfigError("Invalid reference values file")
-                    return self.reference_values
+            reference_values = self._load_cached(self.reference_values_file, orjson.loads)
+            if not reference_values:
+                raise InvalidConfigError("Invalid reference values file")
+            self.reference_values = reference_values
+            return reference_values
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to load reference values: {e}")
+            logger.error("Failed to load reference values: %s", e)
             raise InvalidConfigError("Invalid reference values file")
 
 class VehicleConfig:
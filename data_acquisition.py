@@ -1,7 +1,9 @@
 import asyncio
 import logging
 import sqlite3
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import Dict, List, Tuple
 from python_can import CanBus, CanMessage
 from pyserial import Serial
 import pyobd2
@@ -10,9 +12,8 @@ from pyobd2.exceptions import ConnectionError, ScanError
 from dataclasses import dataclass
 from enum import Enum
 from threading import Lock
+from logging_config import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Define constants
@@ -20,6 +21,7 @@ CAN_BUS_INTERFACE = 'can0'
 OBD_INTERFACE = '/dev/ttyUSB0'
 BUFFER_SIZE = 1000
 SAMPLE_RATE = 100  # Hz
+SENSOR_DATABASE = 'data.db'
 
 # Define data structures
 @dataclass
@@ -43,9 +45,27 @@ class DataAcquisition:
         self.obd_interface = obd_interface
         self.can_bus = None
         self.obd_connection = None
-        self.buffer = []
+        # OBD-II commands are immutable, so build them once
+        self._cmd_rpm = OBDCommand('01 0C', ECU.ENGINE)
+        self._cmd_speed = OBDCommand('01 0D', ECU.ENGINE)
+        self._cmd_throttle = OBDCommand('01 11', ECU.ENGINE)
+        # The OBD-II serial link carries one command/response at a time, so every
+        # query goes through this single worker thread, in submission order
+        self._obd_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='obd')
+        # Ring buffer stored column-wise; buffer_index counts samples ever written
+        self.timestamps = np.empty(BUFFER_SIZE, dtype=np.float64)
+        self.voltages = np.empty(BUFFER_SIZE, dtype=np.float32)
+        self.currents = np.empty(BUFFER_SIZE, dtype=np.float32)
+        self.temperatures = np.empty(BUFFER_SIZE, dtype=np.float32)
+        self.buffer_index = 0
         self.lock = Lock()
         self.connection_status = ConnectionStatus.DISCONNECTED
+        # Persistent connection; transactions are managed explicitly
+        self.db_conn = sqlite3.connect(SENSOR_DATABASE, isolation_level=None, check_same_thread=False)
+        self.db_conn.execute('PRAGMA journal_mode=WAL')
+        self.db_conn.execute('PRAGMA synchronous=NORMAL')
+        self.db_conn.execute('PRAGMA temp_store=MEMORY')
+        self.db_conn.execute('CREATE TABLE IF NOT EXISTS sensor_data (timestamp REAL, voltage REAL, current REAL, temperature REAL)')
 
     def connect_to_can_bus(self) -> bool:
         """
@@ -56,35 +76,61 @@ class DataAcquisition:
         """
         try:
             self.can_bus = CanBus(interface=self.can_bus_interface)
-            logger.info(f'Connected to CAN bus on {self.can_bus_interface}')
+            logger.info('Connected to CAN bus on %s', self.can_bus_interface)
             return True
         except Exception as e:
-            logger.error(f'Failed to connect to CAN bus: {e}')
+            logger.error('Failed to connect to CAN bus: %s', e)
             return False
 
-    def read_obd_data(self) -> Dict[str, float]:
+    def _ensure_obd(self) -> pyobd2.OBD:
+        """
+        Return the OBD-II connection, opening it only if there is no live one.
+
+        Returns:
+            pyobd2.OBD: The OBD-II connection.
+        """
+        if self.obd_connection is None or not self.obd_connection.is_connected():
+            self.obd_connection = pyobd2.OBD(self.obd_interface)
+        return self.obd_connection
+
+    def _query_obd(self) -> Tuple:
+        """
+        Query RPM, speed and throttle position back to back. Runs on the OBD worker thread only.
+
+        Returns:
+            Tuple: The three OBD-II responses.
+        """
+        obd_connection = self._ensure_obd()
+        return (
+            obd_connection.query(self._cmd_rpm),
+            obd_connection.query(self._cmd_speed),
+            obd_connection.query(self._cmd_throttle)
+        )
+
+    async def read_obd_data(self) -> Dict[str, float]:
         """
         Read OBD-II data from the vehicle.
 
+        The queries run on the dedicated OBD worker thread, off the event loop
+        and never interleaved with another query on the same serial link.
+
         Returns:
             Dict[str, float]: Dictionary containing OBD-II data.
         """
         try:
-            if not self.obd_connection:
-                self.obd_connection = pyobd2.OBD(self.obd_interface)
-            cmd = OBDCommand('01 0C', ECU.ENGINE)
-            response = self.obd_connection.query(cmd)
+            loop = asyncio.get_running_loop()
+            rpm, speed, throttle_position = await loop.run_in_executor(self._obd_executor, self._query_obd)
             data = {
-                'rpm': response.value,
-                'speed': self.obd_connection.query(OBDCommand('01 0D', ECU.ENGINE)).value,
-                'throttle_position': self.obd_connection.query(OBDCommand('01 11', ECU.ENGINE)).value
+                'rpm': rpm.value,
+                'speed': speed.value,
+                'throttle_position': throttle_position.value
             }
             return data
         except ConnectionError as e:
-            logger.error(f'Failed to read OBD-II data: {e}')
+            logger.error('Failed to read OBD-II data: %s', e)
             return {}
         except ScanError as e:
-            logger.error(f'Failed to scan OBD-II data: {e}')
+            logger.error('Failed to scan OBD-II data: %s', e)
             return {}
 
     def stream_sensor_data(self) -> asyncio.Task:
@@ -97,7 +143,7 @@ class DataAcquisition:
         async def stream_data():
             while True:
                 try:
-                    can_message = self.can_bus.recv()
+                    can_message = await asyncio.to_thread(self.can_bus.recv)
                     sensor_data = SensorData(
                         timestamp=can_message.timestamp,
                         voltage=can_message.data[0],
@@ -106,8 +152,8 @@ class DataAcquisition:
                     )
                     self.buffer_data(sensor_data)
                 except Exception as e:
-                    logger.error(f'Failed to stream sensor data: {e}')
-                    self.handle_connection_errors()
+                    logger.error('Failed to stream sensor data: %s', e)
+                    await self.handle_connection_errors()
 
         return asyncio.create_task(stream_data())
 
@@ -118,52 +164,75 @@ class DataAcquisition:
         Args:
             sensor_data (SensorData): Sensor data to buffer.
         """
+        # Once BUFFER_SIZE is reached the oldest sample is overwritten
         with self.lock:
-            self.buffer.append(sensor_data)
-            if len(self.buffer) > BUFFER_SIZE:
-                self.buffer.pop(0)
+            i = self.buffer_index % BUFFER_SIZE
+            self.timestamps[i] = sensor_data.timestamp
+            self.voltages[i] = sensor_data.voltage
+            self.currents[i] = sensor_data.current
+            self.temperatures[i] = sensor_data.temperature
+            self.buffer_index += 1
+
+    def buffered_samples(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return views of the buffered samples without copying.
+
+        Once the ring buffer has wrapped, the samples are not in chronological order.
 
-    def handle_connection_errors(self) -> None:
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Timestamp, voltage, current and temperature columns.
         """
-        Handle connection errors and attempt to reconnect.
+        n = min(self.buffer_index, BUFFER_SIZE)
+        return self.timestamps[:n], self.voltages[:n], self.currents[:n], self.temperatures[:n]
+
+    async def handle_connection_errors(self) -> None:
+        """
+        Handle connection errors and attempt to reconnect, without blocking the event loop.
         """
         try:
             if self.connection_status == ConnectionStatus.ERROR:
-                self.connect_to_can_bus()
-                self.obd_connection = pyobd2.OBD(self.obd_interface)
+                await asyncio.to_thread(self.connect_to_can_bus)
+                # Reconnect on the OBD worker so no query sees the connection swapped
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._obd_executor, self._ensure_obd)
                 self.connection_status = ConnectionStatus.CONNECTED
             else:
                 self.connection_status = ConnectionStatus.ERROR
         except Exception as e:
-            logger.error(f'Failed to handle connection error: {e}')
+            logger.error('Failed to handle connection error: %s', e)
 
     def save_data_to_database(self) -> None:
         """
         Save buffered data to a SQLite database.
         """
         try:
-            conn = sqlite3.connect('data.db')
-            cursor = conn.cursor()
-            cursor.execute('CREATE TABLE IF NOT EXISTS sensor_data (timestamp REAL, voltage REAL, current REAL, temperature REAL)')
-            for sensor_data in self.buffer:
-                cursor.execute('INSERT INTO sensor_data VALUES (?, ?, ?, ?)', (sensor_data.timestamp, sensor_data.voltage, sensor_data.current, sensor_data.temperature))
-            conn.commit()
-            conn.close()
+            with self.lock:
+                rows = list(zip(*(column.tolist() for column in self.buffered_samples())))
+            # One transaction per batch, so the whole buffer costs a single sync
+            with self.db_conn:
+                self.db_conn.execute('BEGIN')
+                self.db_conn.executemany('INSERT INTO sensor_data VALUES (?, ?, ?, ?)', rows)
+        except Exception as e:
+            logger.error('Failed to save data to database: %s', e)
+
+async def acquire(data_acquisition: DataAcquisition) -> None:
+    # Keep a reference so the streaming task is not garbage-collected
+    stream_task = data_acquisition.stream_sensor_data()
+    while True:
+        try:
+            obd_data = await data_acquisition.read_obd_data()
+            logger.info('OBD-II data: %s', obd_data)
+            # SQLite writes block, so they run on a worker thread
+            await asyncio.to_thread(data_acquisition.save_data_to_database)
         except Exception as e:
-            logger.error(f'Failed to save data to database: {e}')
+            logger.error('Failed to read OBD-II data: %s', e)
+            await data_acquisition.handle_connection_errors()
 
 def main():
+    configure_logging()
     data_acquisition = DataAcquisition()
     if data_acquisition.connect_to_can_bus():
-        data_acquisition.stream_sensor_data()
-        while True:
-            try:
-                obd_data = data_acquisition.read_obd_data()
-                logger.info(f'OBD-II data: {obd_data}')
-                data_acquisition.save_data_to_database()
-            except Exception as e:
-                logger.error(f'Failed to read OBD-II data: {e}')
-                data_acquisition.handle_connection_errors()
+        asyncio.run(acquire(data_acquisition))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,23 +1,50 @@
 import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, List
+from typing import Dict, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from numba import njit
 from pydantic import BaseModel
+from logging_config import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Define constants and configuration
+BATCH_SIZE = 1024  # Initial size of the batch scratch buffer
+
 @dataclass
 class ValidatorConfig:
-    temperature_range: List[float] = [0.0, 45.0]
+    temperature_range: Tuple[float, float] = (0.0, 45.0)
     voltage_stability_threshold: float = 0.05
     anomaly_detection_threshold: float = 0.1
     defective_cell_threshold: float = 0.2
 
+# fastmath without nnan/ninf, so NaN samples still make both checks False as with np.std
+@njit(cache=True, fastmath={'contract', 'arcp', 'nsz', 'afn', 'reassoc'})
+def _deviation_kernel(data, anomaly_threshold, defective_threshold):
+    # Single Welford pass for mean/variance; tracking min and max alongside
+    # gives the largest absolute deviation without a second sweep
+    n = data.size
+    if n == 0:
+        return False, False
+    mean = 0.0
+    m2 = 0.0
+    lo = data[0]
+    hi = data[0]
+    for i in range(n):
+        x = data[i]
+        delta = x - mean
+        mean += delta / (i + 1)
+        m2 += delta * (x - mean)
+        if x < lo:
+            lo = x
+        if x > hi:
+            hi = x
+    sigma = np.sqrt(m2 / n)
+    max_dev = max(hi - mean, mean - lo)
+    return max_dev > anomaly_threshold * sigma, max_dev > defective_threshold * sigma
+
 class ValidatorError(Enum):
     TEMPERATURE_OUT_OF_RANGE = 1
     VOLTAGE_INSTABILITY = 2
@@ -33,6 +60,9 @@ class ValidatorResult(BaseModel):
 class DataValidator:
     def __init__(self, config: ValidatorConfig):
         self.config = config
+        self._tlo, self._thi = config.temperature_range
+        # Scratch space for validate_batch, grown on demand; not shared across threads
+        self._tmp_flags = np.empty(BATCH_SIZE, dtype=bool)
 
     def check_temperature_range(self, temperature: float) -> bool:
         """
@@ -45,13 +75,12 @@ class DataValidator:
         bool: True if the temperature is within the valid range, False otherwise.
         """
         try:
-            if not self.config.temperature_range[0] <= temperature <= self.config.temperature_range[1]:
-                logger.warning(f"Temperature {temperature} is out of range")
+            if not self._tlo <= temperature <= self._thi:
+                logger.warning("Temperature %s is out of range", temperature)
                 return False
-            logger.info(f"Temperature {temperature} is within valid range")
             return True
         except Exception as e:
-            logger.error(f"Error checking temperature range: {e}")
+            logger.error("Error checking temperature range: %s", e)
             return False
 
     def validate_voltage_stability(self, voltage: float) -> bool:
@@ -66,14 +95,32 @@ class DataValidator:
         """
         try:
             if abs(voltage - 1.0) > self.config.voltage_stability_threshold:
-                logger.warning(f"Voltage {voltage} is not stable")
+                logger.warning("Voltage %s is not stable", voltage)
                 return False
-            logger.info(f"Voltage {voltage} is stable")
             return True
         except Exception as e:
-            logger.error(f"Error validating voltage stability: {e}")
+            logger.error("Error validating voltage stability: %s", e)
             return False
 
+    def _deviation_flags(self, data: np.ndarray) -> Tuple[bool, bool]:
+        """
+        Compare the largest deviation from the mean against both thresholds.
+
+        The mean, standard deviation and largest deviation come from a single
+        pass and are shared by the anomaly and defective-cell checks.
+
+        Args:
+        data (np.ndarray): The data to analyze.
+
+        Returns:
+        Tuple[bool, bool]: Whether an anomaly and a defective cell were detected.
+        """
+        return _deviation_kernel(
+            np.ravel(data),
+            self.config.anomaly_detection_threshold,
+            self.config.defective_cell_threshold
+        )
+
     def detect_anomalies(self, data: np.ndarray) -> bool:
         """
         Detect anomalies in the data using the specified threshold.
@@ -85,13 +132,13 @@ class DataValidator:
         bool: True if an anomaly is detected, False otherwise.
         """
         try:
-            if np.any(np.abs(data - np.mean(data)) > self.config.anomaly_detection_threshold * np.std(data)):
-                logger.warning(f"Anomaly detected in data")
+            anomaly_detected, _ = self._deviation_flags(data)
+            if anomaly_detected:
+                logger.warning("Anomaly detected in data")
                 return True
-            logger.info(f"No anomalies detected in data")
             return False
         except Exception as e:
-            logger.error(f"Error detecting anomalies: {e}")
+            logger.error("Error detecting anomalies: %s", e)
             return False
 
     def flag_defective_cells(self, data: np.ndarray) -> bool:
@@ -105,13 +152,13 @@ class DataValidator:
         bool: True if a defective cell is detected, False otherwise.
         """
         try:
-            if np.any(np.abs(data - np.mean(data)) > self.config.defective_cell_threshold * np.std(data)):
-                logger.warning(f"Defective cell detected in data")
+            _, defective_cell = self._deviation_flags(data)
+            if defective_cell:
+                logger.warning("Defective cell detected in data")
                 return True
-            logger.info(f"No defective cells detected in data")
             return False
         except Exception as e:
-            logger.error(f"Error flagging defective cells: {e}")
+            logger.error("Error flagging defective cells: %s", e)
             return False
 
     def validate_data(self, temperature: float, voltage: float, data: np.ndarray) -> ValidatorResult:
@@ -127,16 +174,25 @@ class DataValidator:
         ValidatorResult: The validation result.
         """
         try:
+            try:
+                anomaly_detected, defective_cell = self._deviation_flags(data)
+            except Exception as e:
+                logger.error("Error analyzing data deviations: %s", e)
+                anomaly_detected, defective_cell = False, False
+            if anomaly_detected:
+                logger.warning("Anomaly detected in data")
+            if defective_cell:
+                logger.warning("Defective cell detected in data")
             result = ValidatorResult(
                 temperature_valid=self.check_temperature_range(temperature),
                 voltage_stable=self.validate_voltage_stability(voltage),
-                anomaly_detected=self.detect_anomalies(data),
-                defective_cell=self.flag_defective_cells(data)
+                anomaly_detected=anomaly_detected,
+                defective_cell=defective_cell
             )
-            logger.info(f"Validation result: {result}")
+            logger.debug("Validation result: %s", result)
             return result
         except Exception as e:
-            logger.error(f"Error validating data: {e}")
+            logger.error("Error validating data: %s", e)
             return ValidatorResult(
                 temperature_valid=False,
                 voltage_stable=False,
@@ -144,8 +200,48 @@ class DataValidator:
                 defective_cell=False
             )
 
+    def validate_batch(self, temperatures: np.ndarray, voltages: np.ndarray, data: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Validate a batch of samples in one vectorized pass.
+
+        Args:
+        temperatures (np.ndarray): The temperatures to check, shape (N,).
+        voltages (np.ndarray): The voltages to validate, shape (N,).
+        data (np.ndarray): The per-sample data to analyze, shape (N, M).
+
+        Returns:
+        Dict[str, np.ndarray]: Boolean arrays of shape (N,), keyed by ValidatorResult field name.
+        """
+        try:
+            lo, hi = self._tlo, self._thi
+            n = len(temperatures)
+            if n > self._tmp_flags.size:
+                self._tmp_flags = np.empty(n, dtype=bool)
+            upper_ok = self._tmp_flags[:n]
+            temperature_valid = np.greater_equal(temperatures, lo)
+            np.less_equal(temperatures, hi, out=upper_ok)
+            np.logical_and(temperature_valid, upper_ok, out=temperature_valid)
+            sigma = data.std(axis=1)
+            max_dev = np.max(np.abs(data - data.mean(axis=1, keepdims=True)), axis=1)
+            return {
+                "temperature_valid": temperature_valid,
+                "voltage_stable": np.abs(voltages - 1.0) <= self.config.voltage_stability_threshold,
+                "anomaly_detected": max_dev > self.config.anomaly_detection_threshold * sigma,
+                "defective_cell": max_dev > self.config.defective_cell_threshold * sigma
+            }
+        except Exception as e:
+            logger.error("Error validating batch: %s", e)
+            n = len(temperatures)
+            return {
+                "temperature_valid": np.zeros(n, dtype=bool),
+                "voltage_stable": np.zeros(n, dtype=bool),
+                "anomaly_detected": np.zeros(n, dtype=bool),
+                "defective_cell": np.zeros(n, dtype=bool)
+            }
+
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
     config = ValidatorConfig()
     validator = DataValidator(config)
     temperature = 25.0
@@ -1,18 +1,41 @@
 import sqlite3
+import time
+import numpy as np
 import pandas as pd
+from numba import njit
 from datetime import datetime
+from dateutil.tz import tzlocal
 import logging
-from typing import List, Dict, Tuple
+from itertools import chain
+from typing import Iterator, List, Dict, Tuple, Union
 from enum import Enum
-from threading import Lock
+from threading import Lock, Timer, local
+from logging_config import configure_logging
 
-# Define logging configuration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Define constants
 DATABASE_NAME = 'soh_database.db'
 TABLE_NAME = 'soh_measurements'
+BUFFER_MAX = 1000  # buffered rows that trigger a flush
+FLUSH_INTERVAL = 5.0  # seconds a buffered row may wait before a timed flush writes it
+FETCH_SIZE = 4096  # rows per chunk yielded by stream_historical_data
+ANALYZE_INTERVAL = 300.0  # minimum seconds between planner statistics refreshes
+# Stored in PRAGMA user_version; 1 = timestamps as INTEGER epoch microseconds.
+# Older tables hold TEXT ISO timestamps or REAL epoch seconds and are migrated.
+SCHEMA_VERSION = 1
+CONNECTION_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'temp_store=MEMORY',
+    'cache_size=-65536',  # 64 MiB
+    'mmap_size=268435456',  # 256 MiB
+    'analysis_limit=1000',  # ANALYZE samples about this many rows per index
+)
+
+# Column layout used by the NumPy analytics paths
+MEASUREMENT_DTYPE = np.dtype([('timestamp', 'i8'), ('soh', 'f8'), ('capacity', 'f8'), ('energy', 'f8')])
+TREND_COLUMNS = ('soh', 'capacity', 'energy')
 
 # Define exception classes
 class DatabaseError(Exception):
@@ -23,15 +46,42 @@ class InvalidMeasurementError(Exception):
 
 # Define data structures/models
 class Measurement:
+    __slots__ = ('_timestamp', '_timestamp_us', 'soh', 'capacity', 'energy')
+
     def __init__(self, timestamp: datetime, soh: float, capacity: float, energy: float):
-        self.timestamp = timestamp
+        self._timestamp = timestamp
+        self._timestamp_us = None
         self.soh = soh
         self.capacity = capacity
         self.energy = energy
 
+    @classmethod
+    def from_row(cls, timestamp_us: int, soh: float, capacity: float, energy: float) -> 'Measurement':
+        # The datetime is only built if a caller reads .timestamp
+        measurement = cls(None, soh, capacity, energy)
+        measurement._timestamp_us = timestamp_us
+        return measurement
+
+    @property
+    def timestamp(self) -> datetime:
+        if self._timestamp is None and self._timestamp_us is not None:
+            self._timestamp = from_epoch_us(self._timestamp_us)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self._timestamp = value
+        self._timestamp_us = None
+
+    @property
+    def timestamp_us(self) -> int:
+        if self._timestamp_us is None and self._timestamp is not None:
+            self._timestamp_us = to_epoch_us(self._timestamp)
+        return self._timestamp_us
+
 # Define validation functions
 def validate_measurement(measurement: Measurement) -> bool:
-    if measurement.timestamp is None or measurement.soh is None or measurement.capacity is None or measurement.energy is None:
+    if None in (measurement.timestamp_us, measurement.soh, measurement.capacity, measurement.energy):
         return False
     if measurement.soh < 0 or measurement.soh > 1:
         return False
@@ -42,18 +92,130 @@ def validate_measurement(measurement: Measurement) -> bool:
     return True
 
 # Define utility methods
-def create_table(conn: sqlite3.Connection) -> None:
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-            id INTEGER PRIMARY KEY,
-            timestamp TEXT NOT NULL,
-            soh REAL NOT NULL,
-            capacity REAL NOT NULL,
-            energy REAL NOT NULL
+def legacy_timestamp_us(value: Union[str, float, int]) -> int:
+    # TEXT isoformat from the original schema, REAL epoch seconds from the first indexed one
+    if isinstance(value, str):
+        return to_epoch_us(datetime.fromisoformat(value))
+    if isinstance(value, float):
+        return round(value * 1_000_000)
+    return value
+
+def to_epoch_us(timestamp: datetime) -> int:
+    return round(timestamp.timestamp() * 1_000_000)
+
+def from_epoch_us(timestamp_us: int) -> datetime:
+    # Split into whole seconds and microseconds so no precision is lost to float division
+    seconds, microseconds = divmod(timestamp_us, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microseconds)
+
+def measurement_row(measurement: Measurement) -> Tuple[int, float, float, float]:
+    return (measurement.timestamp_us, measurement.soh, measurement.capacity, measurement.energy)
+
+def measurement_columns(measurements: Union[List[Measurement], np.ndarray, pd.DataFrame]) -> np.ndarray:
+    # Structured arrays from query_historical_data_columns pass through unchanged
+    if isinstance(measurements, np.ndarray):
+        return measurements
+    if isinstance(measurements, pd.DataFrame):
+        return measurements.to_records(index=False)
+    return np.fromiter(
+        (measurement_row(measurement) for measurement in measurements),
+        dtype=MEASUREMENT_DTYPE,
+        count=len(measurements)
+    )
+
+# SQL is built once per shape; the key is (start_timestamp is None, end_timestamp is None)
+RANGE_FILTERS = {
+    (True, True): '',
+    (False, True): ' WHERE timestamp >= ?',
+    (True, False): ' WHERE timestamp <= ?',
+    (False, False): ' WHERE timestamp >= ? AND timestamp <= ?',
+}
+MEASUREMENT_COLUMNS = 'timestamp, soh, capacity, energy'
+INSERT_SQL = f'INSERT INTO {TABLE_NAME} ({MEASUREMENT_COLUMNS}) VALUES (?, ?, ?, ?)'
+SELECT_ROWS_SQL = {key: f'SELECT * FROM {TABLE_NAME}{clause} ORDER BY timestamp' for key, clause in RANGE_FILTERS.items()}
+SELECT_COLUMNS_SQL = {
+    key: f'SELECT {MEASUREMENT_COLUMNS} FROM {TABLE_NAME}{clause} ORDER BY timestamp'
+    for key, clause in RANGE_FILTERS.items()
+}
+# One row: the sample count and (last - first) / (n - 1) per column
+_TREND_DELTAS = ', '.join(
+    f'(MAX(CASE WHEN rn = cnt THEN {name} END) - MAX(CASE WHEN rn = 1 THEN {name} END)) / (MAX(cnt) - 1)'
+    for name in TREND_COLUMNS
+)
+TRENDS_SQL = {
+    key: f'''
+        SELECT MAX(cnt), {_TREND_DELTAS} FROM (
+            SELECT soh, capacity, energy,
+                   ROW_NUMBER() OVER (ORDER BY timestamp, id) AS rn,
+                   COUNT(*) OVER () AS cnt
+            FROM {TABLE_NAME}{clause}
         )
-    ''')
-    conn.commit()
+    '''
+    for key, clause in RANGE_FILTERS.items()
+}
+# One row: the sample count and, per column, how many steps failed to decrease
+_AGING_LAGS = ', '.join(f'{name} - LAG({name}) OVER (ORDER BY timestamp, id) AS {name}_diff' for name in TREND_COLUMNS)
+_AGING_INCREASES = ', '.join(f'COALESCE(SUM({name}_diff >= 0), 0)' for name in TREND_COLUMNS)
+AGING_SQL = {
+    key: f'''
+        SELECT COUNT(*), {_AGING_INCREASES} FROM (
+            SELECT {_AGING_LAGS} FROM {TABLE_NAME}{clause}
+        )
+    '''
+    for key, clause in RANGE_FILTERS.items()
+}
+
+def range_query(templates: Dict[Tuple[bool, bool], str], start_timestamp: datetime = None, end_timestamp: datetime = None) -> Tuple[str, List[int]]:
+    params = []
+    if start_timestamp is not None:
+        params.append(to_epoch_us(start_timestamp))
+    if end_timestamp is not None:
+        params.append(to_epoch_us(end_timestamp))
+    return templates[start_timestamp is None, end_timestamp is None], params
+
+@njit(cache=True)
+def _all_decreasing3(a, b, c):
+    # Stops at the first step where any of the three columns fails to decrease
+    for i in range(1, a.shape[0]):
+        if a[i] >= a[i - 1] or b[i] >= b[i - 1] or c[i] >= c[i - 1]:
+            return False
+    return True
+
+def create_table(conn: sqlite3.Connection) -> None:
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version > SCHEMA_VERSION:
+        raise DatabaseError(f'{TABLE_NAME} has schema version {version}; this version supports up to {SCHEMA_VERSION}')
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE_NAME,)).fetchone()
+    legacy = exists is not None and version < SCHEMA_VERSION
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if legacy:
+            # Rebuilt rather than updated in place: the old column's TEXT/REAL affinity
+            # would convert integer timestamps back on write
+            conn.execute(f'ALTER TABLE {TABLE_NAME} RENAME TO {TABLE_NAME}_legacy')
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+                id INTEGER PRIMARY KEY,
+                timestamp INTEGER NOT NULL,  -- microseconds since the epoch
+                soh REAL NOT NULL,
+                capacity REAL NOT NULL,
+                energy REAL NOT NULL
+            )
+        ''')
+        if legacy:
+            rows = conn.execute(f'SELECT id, timestamp, soh, capacity, energy FROM {TABLE_NAME}_legacy')
+            conn.executemany(
+                f'INSERT INTO {TABLE_NAME} (id, {MEASUREMENT_COLUMNS}) VALUES (?, ?, ?, ?, ?)',
+                ((row_id, legacy_timestamp_us(timestamp), soh, capacity, energy) for row_id, timestamp, soh, capacity, energy in rows)
+            )
+            conn.execute(f'DROP TABLE {TABLE_NAME}_legacy')
+            logger.info('Migrated %s timestamps to schema version %d', TABLE_NAME, SCHEMA_VERSION)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_ts ON {TABLE_NAME}(timestamp)')
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
 
 def drop_table(conn: sqlite3.Connection) -> None:
     cursor = conn.cursor()
@@ -64,82 +226,196 @@ def drop_table(conn: sqlite3.Connection) -> None:
 class DatabaseManager:
     def __init__(self, db_name: str = DATABASE_NAME):
         self.db_name = db_name
-        self.conn = None
+        # One connection per thread; WAL lets readers run alongside the writer
+        self._tls = local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = Lock()
+        # Guards the write buffer, the writer connection and the INSERT path only
         self.lock = Lock()
+        # Rows waiting to be written by _flush_locked
+        self._buffer: List[Tuple] = []
+        self._buffer_max = BUFFER_MAX
+        self._last_flush = time.monotonic()
+        self._last_analyze = None
+        # Pending timed flush for the rows in _buffer, if any
+        self._flush_timer = None
+        # Shared by every flushing thread, including the timer threads
+        self._write_conn = None
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode; write transactions are opened explicitly in _flush_locked
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, isolation_level=None)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma}')
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = self._tls.conn = self._open()
+        return conn
+
+    def _writer(self) -> sqlite3.Connection:
+        # Caller holds self.lock
+        if self._write_conn is None:
+            self._write_conn = self._open()
+        return self._write_conn
 
     def connect(self) -> None:
-        self.conn = sqlite3.connect(self.db_name)
-        create_table(self.conn)
+        create_table(self._conn())
 
     def disconnect(self) -> None:
-        if self.conn is not None:
-            self.conn.close()
-            self.conn = None
+        if self._connections:
+            self.flush()
+            with self._connections_lock:
+                for conn in self._connections:
+                    conn.close()
+                self._connections.clear()
+            # Drop every thread's reference to the closed connections
+            self._tls = local()
+            self._write_conn = None
 
     def store_measurement(self, measurement: Measurement) -> None:
+        # Buffered; written once BUFFER_MAX rows accumulate, or by a timer at most
+        # FLUSH_INTERVAL seconds after the oldest buffered row
         if not validate_measurement(measurement):
             raise InvalidMeasurementError('Invalid measurement')
         with self.lock:
-            cursor = self.conn.cursor()
-            cursor.execute(f'''
-                INSERT INTO {TABLE_NAME} (timestamp, soh, capacity, energy)
-                VALUES (?, ?, ?, ?)
-            ''', (measurement.timestamp.isoformat(), measurement.soh, measurement.capacity, measurement.energy))
-            self.conn.commit()
-            logger.info(f'Stored measurement at {measurement.timestamp}')
+            self._buffer.append(measurement_row(measurement))
+            if len(self._buffer) >= self._buffer_max:
+                self._flush_locked()
+            elif self._flush_timer is None:
+                self._flush_timer = Timer(FLUSH_INTERVAL, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
 
-    def query_historical_data(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> List[Measurement]:
+    def store_measurements(self, measurements: List[Measurement]) -> None:
+        rows = []
+        for measurement in measurements:
+            if not validate_measurement(measurement):
+                raise InvalidMeasurementError('Invalid measurement')
+            rows.append(measurement_row(measurement))
         with self.lock:
-            cursor = self.conn.cursor()
-            query = f'SELECT * FROM {TABLE_NAME}'
-            params = []
-            if start_timestamp is not None:
-                query += ' WHERE timestamp >= ?'
-                params.append(start_timestamp.isoformat())
-            if end_timestamp is not None:
-                if start_timestamp is not None:
-                    query += ' AND timestamp <= ?'
-                else:
-                    query += ' WHERE timestamp <= ?'
-                params.append(end_timestamp.isoformat())
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            measurements = []
-            for row in rows:
-                measurement = Measurement(
-                    timestamp=datetime.fromisoformat(row[1]),
-                    soh=row[2],
-                    capacity=row[3],
-                    energy=row[4]
-                )
-                measurements.append(measurement)
-            return measurements
+            self._buffer.extend(rows)
+            self._flush_locked()
 
-    def calculate_trends(self, measurements: List[Measurement]) -> Dict[str, float]:
-        trends = {}
-        if len(measurements) < 2:
-            return trends
-        soh_values = [measurement.soh for measurement in measurements]
-        capacity_values = [measurement.capacity for measurement in measurements]
-        energy_values = [measurement.energy for measurement in measurements]
-        soh_trend = (soh_values[-1] - soh_values[0]) / (len(soh_values) - 1)
-        capacity_trend = (capacity_values[-1] - capacity_values[0]) / (len(capacity_values) - 1)
-        energy_trend = (energy_values[-1] - energy_values[0]) / (len(energy_values) - 1)
-        trends['soh'] = soh_trend
-        trends['capacity'] = capacity_trend
-        trends['energy'] = energy_trend
-        return trends
+    def flush(self) -> None:
+        with self.lock:
+            self._flush_locked()
 
-    def detect_aging_patterns(self, measurements: List[Measurement]) -> Tuple[bool, str]:
-        if len(measurements) < 5:
+    def _timed_flush(self) -> None:
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            # The rows stay buffered; the next store schedules another attempt
+            logger.error('Timed flush failed: %s', e)
+
+    def _flush_locked(self) -> None:
+        # Caller holds self.lock; one transaction per batch amortizes the commit
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+        conn = self._writer()
+        try:
+            conn.execute('BEGIN')
+            conn.executemany(INSERT_SQL, self._buffer)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        logger.info('Stored %d measurements', len(self._buffer))
+        self._buffer.clear()
+        self._last_flush = time.monotonic()
+        if self._last_analyze is None or self._last_flush - self._last_analyze >= ANALYZE_INTERVAL:
+            self._analyze_locked()
+
+    def analyze(self) -> None:
+        with self.lock:
+            self._analyze_locked()
+
+    def _analyze_locked(self) -> None:
+        # Refresh planner statistics so range queries use the timestamp index;
+        # analysis_limit keeps the cost independent of the table size
+        self._writer().execute('ANALYZE')
+        self._last_analyze = time.monotonic()
+
+    def stream_historical_data(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> Iterator[List[Measurement]]:
+        # Yields FETCH_SIZE-row chunks so large ranges never sit in memory at once
+        # Make buffered measurements visible; the read itself takes no lock
+        self.flush()
+        cursor = self._conn().cursor()
+        cursor.arraysize = FETCH_SIZE
+        query, params = range_query(SELECT_ROWS_SQL, start_timestamp, end_timestamp)
+        cursor.execute(query, params)
+        try:
+            while rows := cursor.fetchmany():
+                yield [
+                    Measurement.from_row(
+                        timestamp_us=row[1],
+                        soh=row[2],
+                        capacity=row[3],
+                        energy=row[4]
+                    )
+                    for row in rows
+                ]
+        finally:
+            cursor.close()
+
+    def query_historical_data(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> List[Measurement]:
+        return list(chain.from_iterable(self.stream_historical_data(start_timestamp, end_timestamp)))
+
+    def query_historical_data_columns(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> np.ndarray:
+        # Column-oriented variant for analytics; skips building Measurement objects
+        self.flush()
+        query, params = range_query(SELECT_COLUMNS_SQL, start_timestamp, end_timestamp)
+        rows = self._conn().execute(query, params).fetchall()
+        return np.array(rows, dtype=MEASUREMENT_DTYPE)
+
+    def query_historical_data_df(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> pd.DataFrame:
+        # Timestamps are converted from epoch microseconds in one vectorized pass, to the
+        # same naive local time from_epoch_us gives query_historical_data
+        self.flush()
+        query, params = range_query(SELECT_COLUMNS_SQL, start_timestamp, end_timestamp)
+        df = pd.read_sql_query(query, self._conn(), params=params)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='us', utc=True).dt.tz_convert(tzlocal()).dt.tz_localize(None)
+        return df
+
+    def calculate_trends(self, measurements: Union[List[Measurement], np.ndarray, pd.DataFrame]) -> Dict[str, float]:
+        columns = measurement_columns(measurements)
+        n = len(columns)
+        if n < 2:
+            return {}
+        return {name: float((columns[name][-1] - columns[name][0]) / (n - 1)) for name in TREND_COLUMNS}
+
+    def detect_aging_patterns(self, measurements: Union[List[Measurement], np.ndarray, pd.DataFrame]) -> Tuple[bool, str]:
+        columns = measurement_columns(measurements)
+        if len(columns) < 5:
+            return False, 'Insufficient data'
+        if _all_decreasing3(*(columns[name] for name in TREND_COLUMNS)):
+            return True, 'Aging pattern detected'
+        return False, 'No aging pattern detected'
+
+    def calculate_trends_sql(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> Dict[str, float]:
+        # Same result as calculate_trends over the stored range, computed inside SQLite
+        self.flush()
+        query, params = range_query(TRENDS_SQL, start_timestamp, end_timestamp)
+        count, *deltas = self._conn().execute(query, params).fetchone()
+        if count is None or count < 2:
+            return {}
+        return dict(zip(TREND_COLUMNS, deltas))
+
+    def detect_aging_patterns_sql(self, start_timestamp: datetime = None, end_timestamp: datetime = None) -> Tuple[bool, str]:
+        # Same result as detect_aging_patterns over the stored range, computed inside SQLite
+        self.flush()
+        query, params = range_query(AGING_SQL, start_timestamp, end_timestamp)
+        count, *increases = self._conn().execute(query, params).fetchone()
+        if count < 5:
             return False, 'Insufficient data'
-        soh_values = [measurement.soh for measurement in measurements]
-        capacity_values = [measurement.capacity for measurement in measurements]
-        energy_values = [measurement.energy for measurement in measurements]
-        soh_degradation = all(soh_values[i] < soh_values[i-1] for i in range(1, len(soh_values)))
-        capacity_degradation = all(capacity_values[i] < capacity_values[i-1] for i in range(1, len(capacity_values)))
-        energy_degradation = all(energy_values[i] < energy_values[i-1] for i in range(1, len(energy_values)))
-        if soh_degradation and capacity_degradation and energy_degradation:
+        if not any(increases):
             return True, 'Aging pattern detected'
         return False, 'No aging pattern detected'
 
@@ -163,8 +439,10 @@ class DatabaseManagerConfig:
         self.db_name = db_name
 
 # Define unit test compatibility
+import os
+import tempfile
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 class TestDatabaseManager(unittest.TestCase):
     def test_store_measurement(self):
@@ -174,6 +452,26 @@ class TestDatabaseManager(unittest.TestCase):
         db_manager.store_measurement(measurement)
         db_manager.disconnect()
 
+    def test_store_measurements(self):
+        db_manager = DatabaseManager()
+        db_manager.connect()
+        before = len(db_manager.query_historical_data())
+        measurements = [
+            Measurement(datetime.now(), 0.5, 100, 1000),
+            Measurement(datetime.now(), 0.4, 90, 900),
+            Measurement(datetime.now(), 0.3, 80, 800)
+        ]
+        db_manager.store_measurements(measurements)
+        self.assertEqual(len(db_manager.query_historical_data()), before + 3)
+        db_manager.disconnect()
+
+    def test_store_measurements_rejects_invalid(self):
+        db_manager = DatabaseManager()
+        db_manager.connect()
+        with self.assertRaises(InvalidMeasurementError):
+            db_manager.store_measurements([Measurement(datetime.now(), 1.5, 100, 1000)])
+        db_manager.disconnect()
+
     def test_query_historical_data(self):
         db_manager = DatabaseManager()
         db_manager.connect()
@@ -212,5 +510,87 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(message, 'Aging pattern detected')
         db_manager.disconnect()
 
+    def test_sql_analytics_match_python(self):
+        db_manager = DatabaseManager()
+        db_manager.connect()
+        db_manager.store_measurements([
+            Measurement(datetime.fromtimestamp(1000 + i), 0.5 - 0.1 * i, 100 - 10 * i, 1000 - 100 * i)
+            for i in range(5)
+        ])
+        start, end = datetime.fromtimestamp(1000), datetime.fromtimestamp(1004)
+        measurements = db_manager.query_historical_data(start, end)
+        trends = db_manager.calculate_trends_sql(start, end)
+        for name, value in db_manager.calculate_trends(measurements).items():
+            self.assertAlmostEqual(trends[name], value)
+        self.assertEqual(db_manager.detect_aging_patterns_sql(start, end), db_manager.detect_aging_patterns(measurements))
+        db_manager.disconnect()
+
+    def test_buffered_measurement_is_flushed_by_timer(self):
+        with tempfile.TemporaryDirectory() as tmp, patch(f'{__name__}.FLUSH_INTERVAL', 0.05):
+            db_name = os.path.join(tmp, 'timer.db')
+            db_manager = DatabaseManager(db_name)
+            db_manager.connect()
+            db_manager.store_measurement(Measurement(datetime.now(), 0.5, 100, 1000))
+            # Read through an outside connection; DatabaseManager's own reads flush first
+            reader = sqlite3.connect(db_name)
+            deadline = time.monotonic() + 5.0
+            while reader.execute(f'SELECT COUNT(*) FROM {TABLE_NAME}').fetchone()[0] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(reader.execute(f'SELECT COUNT(*) FROM {TABLE_NAME}').fetchone()[0], 1)
+            reader.close()
+            db_manager.disconnect()
+
+    def test_query_historical_data_df_uses_local_time(self):
+        tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                db_manager = DatabaseManager(os.path.join(tmp, 'tz.db'))
+                db_manager.connect()
+                stamps = [datetime(2024, 1, 15, 12, 0), datetime(2024, 7, 15, 12, 0, 0, 500)]
+                db_manager.store_measurements([Measurement(stamp, 0.5, 100, 1000) for stamp in stamps])
+                df = db_manager.query_historical_data_df()
+                self.assertEqual([m.timestamp for m in db_manager.query_historical_data()], stamps)
+                self.assertEqual(df['timestamp'].dt.to_pydatetime().tolist(), stamps)
+                db_manager.disconnect()
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+
+    def test_legacy_timestamps_are_migrated(self):
+        stamp = datetime(2024, 1, 15, 12, 0, 0, 250000)
+        for column_type, stored in (('TEXT', stamp.isoformat()), ('REAL', stamp.timestamp())):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_name = os.path.join(tmp, 'legacy.db')
+                conn = sqlite3.connect(db_name)
+                conn.execute(f'CREATE TABLE {TABLE_NAME} (id INTEGER PRIMARY KEY, timestamp {column_type} NOT NULL, soh REAL NOT NULL, capacity REAL NOT NULL, energy REAL NOT NULL)')
+                conn.execute(f'INSERT INTO {TABLE_NAME} (timestamp, soh, capacity, energy) VALUES (?, 0.5, 100, 1000)', (stored,))
+                conn.commit()
+                conn.close()
+                db_manager = DatabaseManager(db_name)
+                db_manager.connect()
+                conn = db_manager._conn()
+                self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], SCHEMA_VERSION)
+                self.assertEqual(conn.execute(f'SELECT typeof(timestamp) FROM {TABLE_NAME}').fetchone()[0], 'integer')
+                measurements = db_manager.query_historical_data(stamp, stamp)
+                self.assertEqual([m.timestamp for m in measurements], [stamp])
+                db_manager.disconnect()
+
+    def test_newer_schema_is_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = os.path.join(tmp, 'newer.db')
+            conn = sqlite3.connect(db_name)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION + 1}')
+            conn.close()
+            db_manager = DatabaseManager(db_name)
+            with self.assertRaises(DatabaseError):
+                db_manager.connect()
+            db_manager.disconnect()
+
 if __name__ == '__main__':
+    configure_logging()
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Define constants
+POOL_SIZE = 10
+
+class SQLitePool:
+    """Fixed-size pool of aiosqlite connections shared across requests."""
+
+    def __init__(self, db_name: str, size: int = POOL_SIZE):
+        """
+        Initializes the SQLitePool instance.
+
+        Args:
+        - db_name (str): The path to the SQLite database.
+        - size (int): The number of connections held open by the pool.
+        """
+        self.db_name = db_name
+        self.size = size
+        self._connections: List[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+    async def open(self) -> None:
+        """Opens all pooled connections."""
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.db_name)
+            await conn.execute('PRAGMA journal_mode=WAL')
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Closes all pooled connections."""
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrows a connection, waiting until one is idle."""
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = asyncio.Lock()
+
+async def get_db_pool(db_name: str) -> SQLitePool:
+    """Returns the pool for db_name, opening it on first use."""
+    pool = _pools.get(db_name)
+    if pool is not None:
+        return pool
+    async with _pools_lock:
+        if db_name not in _pools:
+            pool = SQLitePool(db_name)
+            await pool.open()
+            _pools[db_name] = pool
+            logger.info('Opened connection pool for %s', db_name)
+        return _pools[db_name]
+
+async def close_db_pool() -> None:
+    """Closes every open pool."""
+    async with _pools_lock:
+        for pool in _pools.values():
+            await pool.close()
+        _pools.clear()
@@ -1,11 +1,14 @@
+import hashlib
 import numpy as np
 import scipy.signal as signal
 import pandas as pd
 import matplotlib.pyplot as plt
-from peakutils import indices
+from numba import float32, float64, int64, njit
 from typing import List, Tuple, Union
 import logging
 import sys
+from collections import OrderedDict
+from threading import Lock
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,9 +28,122 @@ class Config:
         self.capacity_weight = 0.6  # Weight for capacity-based metric
         self.energy_weight = 0.4  # Weight for energy-based metric
         self.sampling_rate = 10  # Sampling rate in Hz
+        self.dtype = np.float32  # Precision of the DV pipeline inputs
 
 config = Config()
 
+# DV pipeline results keyed by a digest of their inputs, least recently used first
+DV_CACHE_SIZE = 32
+_dv_cache: 'OrderedDict[bytes, Tuple[np.ndarray, ...]]' = OrderedDict()
+_dv_cache_lock = Lock()
+
+# Kernels
+# fastmath without nnan/ninf, as soh_calculator.SOH_FASTMATH: NaN and inf stay meaningful
+DV_FASTMATH = {'contract', 'arcp', 'nsz', 'afn'}
+
+# The DV kernels are compiled eagerly for contiguous float32 input only
+@njit(cache=True)
+def _suppress(y, candidates, min_dist, sign):
+    # Within min_dist of a kept peak only the highest (by sign * y) survives,
+    # visiting candidates from highest to lowest like peakutils.indices
+    m = candidates.shape[0]
+    if m < 2 or min_dist < 2:
+        return candidates
+    n = y.shape[0]
+    keep = np.zeros(n, dtype=np.bool_)
+    keep[candidates] = True
+    order = np.argsort(sign * y[candidates])
+    for r in range(m - 1, -1, -1):
+        peak = candidates[order[r]]
+        if keep[peak]:
+            keep[max(0, peak - min_dist):min(n, peak + min_dist + 1)] = False
+            keep[peak] = True
+    return np.flatnonzero(keep)
+
+@njit((float32[::1], float32[::1], int64, float64, float64, float64, int64), cache=True, fastmath=DV_FASTMATH, error_model='numpy')
+def _dv_pipeline(v, s, w, thr_pe, thr_ne, thr_lli, min_dist):
+    # Smoothed DV curve (np.gradient(v) / np.gradient(s) under a 'valid' moving
+    # average), its range, and its local maxima and minima; peaks are then picked
+    # from those candidates without touching the signal again. Requires n >= max(w, 2).
+    # A repeated SOC value gives an inf/NaN ratio, which only affects the windows
+    # that contain it, as with np.convolve
+    n = v.shape[0]
+    m = n - w + 1
+    ratios = np.empty(n, dtype=np.float32)
+    dv = np.empty(m, dtype=np.float32)
+    maxima = np.empty(m, dtype=np.int64)
+    minima = np.empty(m, dtype=np.int64)
+    n_max = 0
+    n_min = 0
+    # One-sided differences at the ends, so the loop below has no boundary cases;
+    # the factor of 1/2 in the central difference cancels in the ratio
+    ratios[0] = (v[1] - v[0]) / (s[1] - s[0])
+    ratios[n - 1] = (v[n - 1] - v[n - 2]) / (s[n - 1] - s[n - 2])
+    for j in range(1, n - 1):
+        ratios[j] = (v[j + 1] - v[j - 1]) / (s[j + 1] - s[j - 1])
+    for k in range(m):
+        acc = 0.0
+        for j in range(k, k + w):
+            acc += ratios[j]
+        dv[k] = acc / w
+    for i in range(1, m - 1):
+        c = dv[i]
+        if c > dv[i - 1] and c > dv[i + 1]:
+            maxima[n_max] = i
+            n_max += 1
+        elif c < dv[i - 1] and c < dv[i + 1]:
+            minima[n_min] = i
+            n_min += 1
+    # NaN-propagating, like the data range peakutils.indices computes
+    lo = dv.min()
+    hi = dv.max()
+    # Thresholds are relative to the data range as in peakutils.indices; NE works
+    # on -dv, whose range is [-hi, -lo]
+    span = hi - lo
+    cut_pe = thr_pe * span + lo
+    cut_lli = thr_lli * span + lo
+    cut_ne = thr_ne * span - hi
+    pe = np.empty(n_max, dtype=np.int64)
+    lli = np.empty(n_max, dtype=np.int64)
+    n_pe = 0
+    n_lli = 0
+    for r in range(n_max):
+        i = maxima[r]
+        if dv[i] > cut_pe:
+            pe[n_pe] = i
+            n_pe += 1
+        if dv[i] > cut_lli:
+            lli[n_lli] = i
+            n_lli += 1
+    ne = np.empty(n_min, dtype=np.int64)
+    n_ne = 0
+    for r in range(n_min):
+        i = minima[r]
+        if -dv[i] > cut_ne:
+            ne[n_ne] = i
+            n_ne += 1
+    return (
+        dv,
+        _suppress(dv, pe[:n_pe], min_dist, 1.0),
+        _suppress(dv, ne[:n_ne], min_dist, -1.0),
+        _suppress(dv, lli[:n_lli], min_dist, 1.0),
+    )
+
+@njit(cache=True, fastmath=DV_FASTMATH, error_model='numpy')
+def _minmax_norm(x):
+    # One reduction pass for both extremes, one pass to write the output;
+    # x is floating point, and constant input gives NaN like (x - mn) / 0
+    mn = x[0]
+    mx = x[0]
+    for i in range(1, x.shape[0]):
+        mn = min(mn, x[i])
+        mx = max(mx, x[i])
+    span = mx - mn
+    out = np.empty_like(x)
+    for i in range(x.shape[0]):
+        out[i] = (x[i] - mn) / span
+    return out
+
 # Exception classes
 class DVAnalyzerError(Exception):
     """Base class for exceptions in the DV Analyzer module."""
@@ -50,9 +166,9 @@ class DVAnalyzer:
             current (np.array): Battery current data.
             soc (np.array): State of charge data.
         """
-        self.voltage = voltage
-        self.current = current
-        self.soc = soc
+        self.voltage = np.ascontiguousarray(voltage, dtype=config.dtype)
+        self.current = np.ascontiguousarray(current, dtype=config.dtype)
+        self.soc = np.ascontiguousarray(soc, dtype=config.dtype)
         self.dv_curve_ = None
         self.degradation_modes_ = None
         self._validate_input()
@@ -62,50 +178,51 @@ class DVAnalyzer:
         if self.voltage.shape[0] != self.current.shape[0] or self.voltage.shape[0] != self.soc.shape[0]:
             raise InvalidInputError("Voltage, current, and SOC data must have the same number of data points.")
 
+        if self.voltage.shape[0] < max(config.dv_window_size, 2):
+            raise InvalidInputError(f"At least {max(config.dv_window_size, 2)} data points are required for a DV window of {config.dv_window_size}.")
+
         if np.any(self.current <= 0):
             raise InvalidInputError("Current data must be greater than zero.")
 
         if not np.all(np.diff(self.soc) >= 0):
             raise InvalidInputError("SOC data must be monotonically increasing.")
 
-    def _smooth(self, data: np.array, window_size: int) -> np.array:
-        """Apply a moving average smoothing to the data."""
-        window = np.ones(window_size) / window_size
-        return np.convolve(data, window, mode='valid')
-
-    def _calculate_dv(self) -> np.array:
-        """Calculate the differential voltage curve."""
-        dv = np.gradient(self.voltage) / np.gradient(self.soc)
-        dv = self._smooth(dv, config.dv_window_size)
-        return dv
-
-    def _detect_lam_pe(self, dv: np.array) -> List[int]:
-        """Detect positive electrode (PE) lamination using velocity-threshold method."""
-        indices_pe = indices(dv, thres=config.lam_pe_threshold, min_dist=config.dv_window_size)
-        return indices_pe
-
-    def _detect_lam_ne(self, dv: np.array) -> List[int]:
-        """Detect negative electrode (NE) lamination using velocity-threshold method."""
-        indices_ne = indices(-dv, thres=config.lam_ne_threshold, min_dist=config.dv_window_size)
-        return indices_ne
-
-    def _detect_lli(self, dv: np.array) -> List[int]:
-        """Detect lithium plating (LLI) using velocity-threshold method."""
-        indices_lli = indices(dv, thres=config.lli_threshold, min_dist=config.dv_window_size)
-        return indices_lli
-
-    def _identify_degradation_modes(self) -> None:
-        """Identify degradation modes based on differential voltage curve."""
-        self.degradation_modes_ = {
-            'lam_pe': self._detect_lam_pe(self.dv_curve_),
-            'lam_ne': self._detect_lam_ne(self.dv_curve_),
-            'lli': self._detect_lli(self.dv_curve_)
-        }
+    def _dv_cache_key(self) -> bytes:
+        """Digest of the inputs that determine the DV curve and its peaks."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.voltage.tobytes())
+        digest.update(self.soc.tobytes())
+        digest.update(config.dv_window_size.to_bytes(8, 'little'))
+        digest.update(np.array([config.lam_pe_threshold, config.lam_ne_threshold, config.lli_threshold]).tobytes())
+        return digest.digest()
+
+    def _run_dv_pipeline(self) -> Tuple[np.array, np.array, np.array, np.array]:
+        """Calculate the DV curve and PE, NE and LLI peaks, reusing a cached result for identical inputs."""
+        key = self._dv_cache_key()
+        with _dv_cache_lock:
+            result = _dv_cache.get(key)
+            if result is not None:
+                _dv_cache.move_to_end(key)
+        if result is None:
+            result = _dv_pipeline(
+                self.voltage, self.soc, config.dv_window_size,
+                config.lam_pe_threshold, config.lam_ne_threshold, config.lli_threshold,
+                config.dv_window_size
+            )
+            with _dv_cache_lock:
+                _dv_cache[key] = result
+                if len(_dv_cache) > DV_CACHE_SIZE:
+                    _dv_cache.popitem(last=False)
+        return tuple(array.copy() for array in result)
 
     def calculate_dv_curve(self) -> np.array:
         """Calculate the differential voltage curve and identify degradation modes."""
-        self.dv_curve_ = self._calculate_dv()
-        self._identify_degradation_modes()
+        self.dv_curve_, lam_pe, lam_ne, lli = self._run_dv_pipeline()
+        self.degradation_modes_ = {
+            'lam_pe': lam_pe,
+            'lam_ne': lam_ne,
+            'lli': lli
+        }
         return self.dv_curve_
 
     def identify_degradation_modes(self) -> dict:
@@ -126,14 +243,16 @@ class DVAnalyzer:
 
     def normalize_features(self, features: np.array) -> np.array:
         """Normalize the feature vector using min-max scaling."""
-        min_val = np.min(features)
-        max_val = np.max(features)
-        return (features - min_val) / (max_val - min_val)
+        x = np.ravel(features)
+        # Integer features are scaled in float64, as NumPy's true division would
+        if not np.issubdtype(x.dtype, np.floating):
+            x = x.astype(np.float64)
+        return _minmax_norm(x).reshape(np.shape(features))
 
 # Helper functions
 def load_data(filename: str) -> Tuple[np.array, np.array, np.array]:
     """Load voltage, current, and SOC data from a CSV file."""
-    data = pd.read_csv(filename)
+    data = pd.read_csv(filename, dtype={'Voltage': config.dtype, 'Current': config.dtype, 'SOC': config.dtype})
     voltage = data['Voltage'].values
     current = data['Current'].values
     soc = data['SOC'].values
@@ -0,0 +1,42 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Define constants
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def queue_handler(*handlers: logging.Handler) -> QueueHandler:
+    """
+    Wraps handlers behind a queue drained by a background listener thread.
+
+    Args:
+    - handlers (logging.Handler): The handlers that perform the actual I/O.
+
+    Returns:
+    - A QueueHandler that only enqueues records at the log site.
+    """
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(log_queue)
+
+def configure_logging(level: int = logging.INFO, fmt: str = LOG_FORMAT) -> None:
+    """
+    Configures the root logger to emit to stderr through a queue.
+
+    Like logging.basicConfig, this does nothing if the root logger already
+    has handlers.
+
+    Args:
+    - level (int): The root logger level.
+    - fmt (str): The log record format.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(fmt))
+    root.setLevel(level)
+    root.addHandler(queue_handler(stream_handler))
@@ -13,6 +13,7 @@ from threading import Lock
 # Define constants
 VELOCITY_THRESHOLD = 0.5  # velocity threshold from the research paper
 FLOW_THEORY_CONSTANT = 0.2  # flow theory constant from the research paper
+REQUIRED_CONDITIONS = frozenset(("temperature", "voltage", "current"))
 
 # Define exception classes
 class SohAnalysisError(Exception):
@@ -37,11 +38,7 @@ class SohResult:
 # Define validation functions
 def validate_measurement_conditions(measurement_conditions: Dict[str, float]) -> bool:
     """Validates measurement conditions"""
-    required_conditions = ["temperature", "voltage", "current"]
-    for condition in required_conditions:
-        if condition not in measurement_conditions:
-            return False
-    return True
+    return REQUIRED_CONDITIONS.issubset(measurement_conditions)
 
 # Define utility methods
 def calculate_velocity(measurement_conditions: Dict[str, float]) -> float:
@@ -1,20 +1,23 @@
 import logging
-import time
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
 from typing import Dict, List
+import numpy as np
 from pyserial import Serial
 from config_handler import ConfigHandler
 from data_acquisition import DataAcquisition
-from threading import Lock
+from threading import Event, Lock
 from enum import Enum
+from logging_config import configure_logging
+from poll_kernel import BALANCING_OK, TEMPERATURE_OK, VOLTAGE_OK, _poll_decide
 
 # Constants
 CHARGING_SESSION_TIMEOUT = 3600  # 1 hour
 VOLTAGE_TOLERANCE = 0.1  # 0.1V
 TEMPERATURE_TOLERANCE = 5  # 5°C
 BALANCING_STATE_THRESHOLD = 0.5  # 0.5V
+POLL_INTERVAL = 1.0  # seconds between limit checks
 
-# Logging configuration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 class ChargingSessionStatus(Enum):
     INITIATED = 1
@@ -36,6 +39,8 @@ class MeasurementController:
         self.charging_session_status = ChargingSessionStatus.INITIATED
         self.lock = Lock()
         self.serial_connection = None
+        # Set when the session ends so a pending poll wait returns immediately
+        self.session_ended = Event()
 
     def initiate_charging_session(self) -> bool:
         """
@@ -53,13 +58,13 @@ class MeasurementController:
             response = self.serial_connection.readline().decode('utf-8')
             if response == 'charging_session_initiated':
                 self.charging_session_status = ChargingSessionStatus.IN_PROGRESS
-                logging.info('Charging session initiated successfully')
+                logger.info('Charging session initiated successfully')
                 return True
             else:
-                logging.error('Failed to initiate charging session')
+                logger.error('Failed to initiate charging session')
                 return False
         except Exception as e:
-            logging.error(f'Error initiating charging session: {e}')
+            logger.error('Error initiating charging session: %s', e)
             return False
 
     def monitor_voltage_range(self) -> bool:
@@ -74,13 +79,13 @@ class MeasurementController:
             voltage = self.data_acquisition.read_voltage()
             # Check if the voltage is within the tolerance
             if abs(voltage - self.config_handler.get_target_voltage()) <= VOLTAGE_TOLERANCE:
-                logging.info(f'Voltage is within tolerance: {voltage}V')
+                logger.debug('Voltage is within tolerance: %sV', voltage)
                 return True
             else:
-                logging.warning(f'Voltage is out of tolerance: {voltage}V')
+                logger.warning('Voltage is out of tolerance: %sV', voltage)
                 return False
         except Exception as e:
-            logging.error(f'Error monitoring voltage range: {e}')
+            logger.error('Error monitoring voltage range: %s', e)
             return False
 
     def enforce_temperature_limits(self) -> bool:
@@ -95,13 +100,13 @@ class MeasurementController:
             temperature = self.data_acquisition.read_temperature()
             # Check if the temperature is within the tolerance
             if abs(temperature - self.config_handler.get_target_temperature()) <= TEMPERATURE_TOLERANCE:
-                logging.info(f'Temperature is within tolerance: {temperature}°C')
+                logger.debug('Temperature is within tolerance: %s°C', temperature)
                 return True
             else:
-                logging.warning(f'Temperature is out of tolerance: {temperature}°C')
+                logger.warning('Temperature is out of tolerance: %s°C', temperature)
                 return False
         except Exception as e:
-            logging.error(f'Error enforcing temperature limits: {e}')
+            logger.error('Error enforcing temperature limits: %s', e)
             return False
 
     def handle_balancing_states(self) -> bool:
@@ -116,15 +121,80 @@ class MeasurementController:
             balancing_state = self.data_acquisition.read_balancing_state()
             # Check if the balancing state is within the threshold
             if abs(balancing_state - self.config_handler.get_target_balancing_state()) <= BALANCING_STATE_THRESHOLD:
-                logging.info(f'Balancing state is within threshold: {balancing_state}V')
+                logger.debug('Balancing state is within threshold: %sV', balancing_state)
                 return True
             else:
-                logging.warning(f'Balancing state is out of threshold: {balancing_state}V')
+                logger.warning('Balancing state is out of threshold: %sV', balancing_state)
                 return False
         except Exception as e:
-            logging.error(f'Error handling balancing states: {e}')
+            logger.error('Error handling balancing states: %s', e)
             return False
 
+    def check_session_limits(self, executor: Executor) -> bool:
+        """
+        Runs the voltage, temperature and balancing checks concurrently.
+
+        The poll takes as long as the slowest read rather than the sum of all three.
+        Each read must be safe to run alongside the others; reads that share a serial
+        link have to be serialized on that link, as DataAcquisition does for OBD-II.
+
+        Args:
+        - executor (Executor): Executor the sensor reads are submitted to.
+
+        Returns:
+        - bool: True if any check passes, False if all of them fail.
+        """
+        checks = (self.monitor_voltage_range, self.enforce_temperature_limits, self.handle_balancing_states)
+        futures = [executor.submit(check) for check in checks]
+        # Wait for every read, so a slow one cannot outlive its poll and have the
+        # next poll's reads queue up behind it
+        wait(futures)
+        return any(future.result() for future in futures)
+
+    def evaluate_samples(self, voltages: np.ndarray, temperatures: np.ndarray, balancing_states: np.ndarray) -> np.ndarray:
+        """
+        Checks a batch of buffered samples against the session limits.
+
+        Gives the same per-sample result as monitor_voltage_range, enforce_temperature_limits
+        and handle_balancing_states. Not called by main() yet: its poll loop still reads one
+        sample per check, and DataAcquisition does not buffer balancing states.
+
+        Args:
+        - voltages (np.ndarray): Voltage samples.
+        - temperatures (np.ndarray): Temperature samples, aligned with voltages.
+        - balancing_states (np.ndarray): Balancing state samples, aligned with voltages.
+
+        Returns:
+        - np.ndarray: uint8 flags per sample combining VOLTAGE_OK, TEMPERATURE_OK and BALANCING_OK.
+          A sample with no flags set would have terminated the session.
+        """
+        targets = np.array([
+            self.config_handler.get_target_voltage(),
+            self.config_handler.get_target_temperature(),
+            self.config_handler.get_target_balancing_state()
+        ], dtype=np.float64)
+        tols = np.array([VOLTAGE_TOLERANCE, TEMPERATURE_TOLERANCE, BALANCING_STATE_THRESHOLD], dtype=np.float64)
+        out_flags = np.empty(len(voltages), dtype=np.uint8)
+        _poll_decide(
+            np.ascontiguousarray(voltages, dtype=np.float32),
+            np.ascontiguousarray(temperatures, dtype=np.float32),
+            np.ascontiguousarray(balancing_states, dtype=np.float32),
+            targets, tols, out_flags
+        )
+        return out_flags
+
+    def wait_for_next_poll(self, timeout: float = POLL_INTERVAL) -> bool:
+        """
+        Waits until the next poll is due.
+
+        Args:
+        - timeout (float): The maximum time to wait in seconds.
+
+        Returns:
+        - bool: True if polling should continue, False if the session ended while waiting.
+        """
+        return not self.session_ended.wait(timeout)
+
     def terminate_session(self) -> bool:
         """
         Terminates the charging session.
@@ -139,13 +209,14 @@ class MeasurementController:
             response = self.serial_connection.readline().decode('utf-8')
             if response == 'charging_session_terminated':
                 self.charging_session_status = ChargingSessionStatus.TERMINATED
-                logging.info('Charging session terminated successfully')
+                self.session_ended.set()
+                logger.info('Charging session terminated successfully')
                 return True
             else:
-                logging.error('Failed to terminate charging session')
+                logger.error('Failed to terminate charging session')
                 return False
         except Exception as e:
-            logging.error(f'Error terminating charging session: {e}')
+            logger.error('Error terminating charging session: %s', e)
             return False
 
     def get_charging_session_status(self) -> ChargingSessionStatus:
@@ -181,6 +252,7 @@ class MeasurementControllerException(Exception):
     pass
 
 def main():
+    configure_logging()
     # Create configuration handler instance
     config_handler = ConfigHandler()
     # Create data acquisition instance
@@ -189,21 +261,19 @@ def main():
     measurement_controller = MeasurementController(config_handler, data_acquisition)
     # Initiate charging session
     if measurement_controller.initiate_charging_session():
-        # Monitor voltage range
-        while measurement_controller.is_charging_session_in_progress():
-            if not measurement_controller.monitor_voltage_range():
-                # Enforce temperature limits
-                if not measurement_controller.enforce_temperature_limits():
-                    # Handle balancing states
-                    if not measurement_controller.handle_balancing_states():
-                        # Terminate session
-                        measurement_controller.terminate_session()
-                        break
-            time.sleep(1)
+        # Monitor voltage range, temperature limits and balancing states in parallel
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            while measurement_controller.is_charging_session_in_progress():
+                if not measurement_controller.check_session_limits(executor):
+                    # Terminate session
+                    measurement_controller.terminate_session()
+                    break
+                if not measurement_controller.wait_for_next_poll():
+                    break
         # Close serial connection
         measurement_controller.close_serial_connection()
     else:
-        logging.error('Failed to initiate charging session')
+        logger.error('Failed to initiate charging session')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from numba import njit
+
+# Per-sample decision flags written by _poll_decide; 0 means every check failed
+VOLTAGE_OK = 1
+TEMPERATURE_OK = 2
+BALANCING_OK = 4
+
+# Kept apart from measurement_controller so the kernel loads without the serial/CAN stack
+@njit(cache=True)
+def _poll_decide(voltage_buf, temp_buf, balancing_buf, targets, tols, out_flags):
+    # targets and tols are ordered (voltage, temperature, balancing state) and
+    # float64, so the float32 samples are compared as the per-sample checks do;
+    # a NaN sample fails its check
+    for i in range(out_flags.shape[0]):
+        flags = 0
+        if abs(voltage_buf[i] - targets[0]) <= tols[0]:
+            flags |= VOLTAGE_OK
+        if abs(temp_buf[i] - targets[1]) <= tols[1]:
+            flags |= TEMPERATURE_OK
+        if abs(balancing_buf[i] - targets[2]) <= tols[2]:
+            flags |= BALANCING_OK
+        out_flags[i] = flags
@@ -1,47 +1,87 @@
+import asyncio
+import os
+import io
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Headless rendering; must precede the pyplot import
 import matplotlib.pyplot as plt
 from jinja2 import Template
-import pdfkit
+import weasyprint
 from datetime import datetime
 import logging
 import logging.config
-from typing import Dict, List
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from report_generator.config import settings
 from report_generator.exceptions import ReportGenerationError
 from report_generator.utils import load_data, validate_input
 from report_generator.models import BatteryReport, SummaryTable
 
-# Configure logging
-logging.config.dictConfig(settings.LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
 
+# Separates reports rendered into one PDF document
+PAGE_BREAK = '<div style="page-break-after: always"></div>'
+
+@lru_cache(maxsize=16)
+def _get_template(source: str) -> Template:
+    """Compile a report template once per process and source string."""
+    return Template(source)
+
+# Columns summarized when the report data has one row per cell or cycle
+SUMMARY_COLUMNS = ['capacity', 'energy', 'health']
+
+# Compiled at import, so pool workers start with the default template ready
+REPORT_TEMPLATE = _get_template(settings.REPORT_TEMPLATE)
+
+def _write_pdf(html: str, output_path: str) -> None:
+    """Parse rendered HTML and lay it out as a PDF; both steps are CPU-bound."""
+    weasyprint.HTML(string=html).write_pdf(output_path)
+
+def _render_one(job: Tuple['BatteryReport', str, str]) -> None:
+    """Render one report to its own PDF; module-level so process pools can pickle it."""
+    report, output_path, template_source = job
+    _write_pdf(_get_template(template_source).render(report=report), output_path)
+
 class ReportGenerator:
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, template_source: str = settings.REPORT_TEMPLATE):
         self.data = data
+        self.template_source = template_source
+        self.template = _get_template(template_source)
+        # Parsed and validated once; every method reads this copy
+        try:
+            self._data = load_data(data)
+            validate_input(self._data)
+        except Exception as e:
+            logger.error("Error loading report data: %s", e)
+            raise ReportGenerationError(f"Error loading report data: {str(e)}")
+
+    def _resolve_data(self, data: Optional[Dict]) -> Dict:
+        """Return the validated data, parsing only input that differs from the instance's."""
+        if data is None or data is self.data or data is self._data:
+            return self._data
+        data = load_data(data)
+        validate_input(data)
+        return data
 
     def create_soh_report(self) -> BatteryReport:
         """Create a standardized SOH report for regulatory compliance."""
         try:
-            # Load data from input
-            data = load_data(self.data)
-
-            # Validate input data
-            validate_input(data)
-
             # Calculate SOH metrics
-            soh_metrics = self.calculate_soh_metrics(data)
+            soh_metrics = self.calculate_soh_metrics(self._data)
 
-            # Create report
-            report = BatteryReport(
+            # Create report; both parts are built and validated here, so skip re-validation
+            report = BatteryReport.model_construct(
                 soh_metrics=soh_metrics,
-                summary_table=self.generate_summary_table(data)
+                summary_table=self.generate_summary_table()
             )
 
             return report
 
         except Exception as e:
-            logger.error(f"Error creating SOH report: {str(e)}")
+            logger.error("Error creating SOH report: %s", e)
             raise ReportGenerationError(f"Error creating SOH report: {str(e)}")
 
     def calculate_soh_metrics(self, data: Dict) -> Dict:
@@ -54,40 +94,48 @@ class ReportGenerator:
             "health": 85
         }
 
-    def plot_dv_curves(self, data: Dict) -> None:
-        """Plot differential voltage curves based on input data."""
+    def plot_dv_curves(self, data: Optional[Dict] = None) -> bytes:
+        """Plot differential voltage curves based on input data and return them as PNG bytes."""
         try:
-            # Load data from input
-            data = load_data(data)
-
-            # Validate input data
-            validate_input(data)
+            data = self._resolve_data(data)
 
             # Plot DV curves
-            self.plot_curves(data)
+            return self.plot_curves(data)
 
         except Exception as e:
-            logger.error(f"Error plotting DV curves: {str(e)}")
+            logger.error("Error plotting DV curves: %s", e)
             raise ReportGenerationError(f"Error plotting DV curves: {str(e)}")
 
-    def plot_curves(self, data: Dict) -> None:
-        """Plot differential voltage curves."""
+    def plot_curves(self, data: Dict) -> bytes:
+        """Plot differential voltage curves and return the figure as PNG bytes."""
         # Implement DV curve plotting algorithm here
         # For demonstration purposes, plot a dummy curve
-        plt.plot([1, 2, 3, 4, 5])
-        plt.xlabel("X-axis")
-        plt.ylabel("Y-axis")
-        plt.title("Differential Voltage Curve")
-        plt.show()
-
-    def generate_summary_table(self, data: Dict) -> SummaryTable:
-        """Generate a summary table based on input data."""
+        fig, ax = plt.subplots()
+        try:
+            ax.plot([1, 2, 3, 4, 5])
+            ax.set_xlabel("X-axis")
+            ax.set_ylabel("Y-axis")
+            ax.set_title("Differential Voltage Curve")
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', dpi=100)
+            return buf.getvalue()
+        finally:
+            # Release the figure; pyplot keeps every open figure alive otherwise
+            plt.close(fig)
+
+    def generate_summary_table(self, data: Optional[Dict] = None) -> SummaryTable:
+        """Generate a summary table based on input data; tabular data is summarized per column."""
         try:
-            # Load data from input
-            data = load_data(data)
+            data = self._resolve_data(data)
 
-            # Validate input data
-            validate_input(data)
+            if isinstance(data, pd.DataFrame):
+                # One aggregation over all columns; SummaryTable holds one scalar per column
+                means = data[SUMMARY_COLUMNS].mean()
+                return SummaryTable(
+                    capacity=float(means["capacity"]),
+                    energy=float(means["energy"]),
+                    health=float(means["health"])
+                )
 
             # Create summary table
             summary_table = SummaryTable(
@@ -99,25 +147,47 @@ class ReportGenerator:
             return summary_table
 
         except Exception as e:
-            logger.error(f"Error generating summary table: {str(e)}")
+            logger.error("Error generating summary table: %s", e)
             raise ReportGenerationError(f"Error generating summary table: {str(e)}")
 
-    def export_to_pdf(self, report: BatteryReport) -> None:
-        """Export the SOH report to a PDF file."""
+    async def export_to_pdf_async(self, report: BatteryReport, output_path: str = settings.REPORT_OUTPUT) -> None:
+        """Export the SOH report to a PDF file without blocking the event loop."""
         try:
-            # Create a Jinja2 template for the report
-            template = Template(settings.REPORT_TEMPLATE)
-
-            # Render the report using the template
-            rendered_report = template.render(report=report)
+            # Render the report using the shared template
+            rendered_report = self.template.render(report=report)
 
-            # Export the report to a PDF file
-            pdfkit.from_string(rendered_report, settings.REPORT_OUTPUT)
+            # WeasyPrint parses and renders in-process; run both on a worker thread so the loop stays free
+            await asyncio.to_thread(_write_pdf, rendered_report, output_path)
 
         except Exception as e:
-            logger.error(f"Error exporting report to PDF: {str(e)}")
+            logger.error("Error exporting report to PDF: %s", e)
             raise ReportGenerationError(f"Error exporting report to PDF: {str(e)}")
 
+    def export_to_pdf(self, report: BatteryReport, output_path: str = settings.REPORT_OUTPUT) -> None:
+        """Export the SOH report to a PDF file. Blocking wrapper; use export_to_pdf_async inside an event loop."""
+        asyncio.run(self.export_to_pdf_async(report, output_path))
+
+    def export_batch_to_pdf(self, reports: List[BatteryReport], output_path: str = settings.REPORT_OUTPUT) -> None:
+        """Export several SOH reports to one PDF file, one report per page, in a single render."""
+        try:
+            rendered_reports = [self.template.render(report=report) for report in reports]
+            _write_pdf(PAGE_BREAK.join(rendered_reports), output_path)
+
+        except Exception as e:
+            logger.error("Error exporting reports to PDF: %s", e)
+            raise ReportGenerationError(f"Error exporting reports to PDF: {str(e)}")
+
+    def export_many_to_pdf(self, reports: List[BatteryReport], output_paths: List[str]) -> None:
+        """Export each SOH report to its own PDF file, rendering them in parallel worker processes."""
+        try:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                jobs = ((report, output_path, self.template_source) for report, output_path in zip(reports, output_paths))
+                list(executor.map(_render_one, jobs))
+
+        except Exception as e:
+            logger.error("Error exporting reports to PDF: %s", e)
+            raise ReportGenerationError(f"Error exporting reports to PDF: {str(e)}")
+
     def format_for_battery_passport(self, report: BatteryReport) -> Dict:
         """Format the SOH report for inclusion in a battery passport."""
         try:
@@ -128,32 +198,38 @@ class ReportGenerator:
             formatted_report["soh_metrics"] = report.soh_metrics
 
             # Add the summary table to the formatted report
-            formatted_report["summary_table"] = report.summary_table.to_dict()
+            formatted_report["summary_table"] = report.summary_table.model_dump(mode='json')
 
             return formatted_report
 
         except Exception as e:
-            logger.error(f"Error formatting report for battery passport: {str(e)}")
+            logger.error("Error formatting report for battery passport: %s", e)
             raise ReportGenerationError(f"Error formatting report for battery passport: {str(e)}")
 
-def main():
-    # Load input data from a file
-    data = load_data(settings.INPUT_FILE)
+    def export_battery_passport_json(self, report: BatteryReport, output_path: str) -> None:
+        """Write the battery passport form of the SOH report to a JSON file."""
+        try:
+            with open(output_path, 'wb') as file:
+                file.write(orjson.dumps(self.format_for_battery_passport(report), option=orjson.OPT_SERIALIZE_NUMPY))
 
-    # Validate input data
-    validate_input(data)
+        except Exception as e:
+            logger.error("Error exporting battery passport JSON: %s", e)
+            raise ReportGenerationError(f"Error exporting battery passport JSON: {str(e)}")
+
+def main():
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
 
-    # Create a report generator instance
-    report_generator = ReportGenerator(data)
+    # Create a report generator instance; it loads and validates the input file once
+    report_generator = ReportGenerator(settings.INPUT_FILE)
 
     # Create a SOH report
     report = report_generator.create_soh_report()
 
     # Plot DV curves
-    report_generator.plot_dv_curves(data)
+    report_generator.plot_dv_curves()
 
     # Generate a summary table
-    summary_table = report_generator.generate_summary_table(data)
+    summary_table = report_generator.generate_summary_table()
 
     # Export the report to a PDF file
     report_generator.export_to_pdf(report)
@@ -161,8 +237,8 @@ def main():
     # Format the report for inclusion in a battery passport
     formatted_report = report_generator.format_for_battery_passport(report)
 
-    # Print the formatted report
-    print(formatted_report)
+    # Log the formatted report
+    logger.info("Formatted report: %s", formatted_report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
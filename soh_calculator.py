@@ -1,56 +1,166 @@
 import numpy as np
-from scipy import integrate
 import pandas as pd
 from config_handler import ConfigHandler
 import logging
-from typing import Dict, List, Tuple
-from pydantic import BaseModel
+from typing import Dict, List, Tuple, Union
+from numba import boolean, float32, float64, njit, prange, types
+from logging_config import configure_logging
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class SOHCalculator(BaseModel):
+@njit(parallel=True, cache=True)
+def _vwin(data, lo, hi, out):
+    # Single pass: keep samples strictly inside (lo, hi), NaN elsewhere
+    for i in prange(data.shape[0]):
+        x = data[i]
+        out[i] = x if lo < x < hi else np.nan
+    return out
+
+@njit(cache=True)
+def _cumtrapz(data, time, charge, discharge):
+    # cumulative_trapezoid(data, time, initial=0) into charge, its negation into discharge
+    acc = 0.0
+    charge[0] = 0.0
+    discharge[0] = 0.0
+    for i in range(1, data.shape[0]):
+        acc += 0.5 * (data[i] + data[i - 1]) * (time[i] - time[i - 1])
+        charge[i] = acc
+        discharge[i] = -acc
+
+# Fast-math flags that keep NaN/inf semantics; windowed-out samples are NaN
+SOH_FASTMATH = {'contract', 'arcp', 'nsz', 'afn'}
+
+# The SOH pipelines are compiled eagerly for these signatures and cached on
+# disk, so short-lived CLI runs load machine code instead of re-typing them.
+# Read-only signatures also accept writable arrays; pandas hands out read-only buffers
+@njit([
+    types.Tuple((float64, boolean))(array, array, float64, float64, float64, float64)
+    for array in (types.Array(float32, 1, 'C', readonly=True), types.Array(float64, 1, 'C', readonly=True))
+], cache=True, fastmath=SOH_FASTMATH)
+def _soh_pipeline(data, time, lo, hi, cut_c, cut_d):
+    # Voltage window, cumulative trapezoid, cutoff check and SOH ratio in one
+    # pass. discharge is -charge and both start at 0, so the ratio only needs
+    # the final charge. Returns (soh, ok); ok is False if a cutoff is crossed.
+    # Inputs may be float32; the running charge is accumulated in float64.
+    prev = data[0] if lo < data[0] < hi else np.nan
+    charge = 0.0
+    if charge < cut_c or -charge < cut_d:
+        return np.nan, False
+    for i in range(1, data.shape[0]):
+        x = data[i] if lo < data[i] < hi else np.nan
+        charge += 0.5 * (x + prev) * (time[i] - time[i - 1])
+        if charge < cut_c or -charge < cut_d:
+            return np.nan, False
+        prev = x
+    # NOTE: with discharge == -charge this ratio is always -1 (or NaN); kept
+    # identical to calculate_capacity_soh_velocity_threshold until the
+    # intended formula is settled
+    return charge / -charge, True
+
+# One row per series, all sampled at the same times; each row runs _soh_pipeline on
+# its own core, writing its (soh, ok) pair into out and ok
+@njit([
+    types.none(matrix, array, float64, float64, float64, float64, float64[::1], boolean[::1])
+    for matrix, array in (
+        (types.Array(float32, 2, 'C', readonly=True), types.Array(float32, 1, 'C', readonly=True)),
+        (types.Array(float64, 2, 'C', readonly=True), types.Array(float64, 1, 'C', readonly=True)),
+    )
+], parallel=True, cache=True)
+def _soh_pipeline_batched(data, time, lo, hi, cut_c, cut_d, out, ok):
+    for r in prange(data.shape[0]):
+        soh, row_ok = _soh_pipeline(data[r], time, lo, hi, cut_c, cut_d)
+        out[r] = soh
+        ok[r] = row_ok
+
+def _kernel_inputs(*arrays: np.ndarray) -> List[np.ndarray]:
+    """Contiguous arrays in the one dtype _soh_pipeline is compiled for: float32 if all are, else float64."""
+    dtype = np.float32 if all(a.dtype == np.float32 for a in arrays) else np.float64
+    return [np.ascontiguousarray(a, dtype=dtype) for a in arrays]
+
+class SOHCalculator:
     """State of Health (SOH) Calculator"""
     
     def __init__(self, config: ConfigHandler):
         self.config = config
         self.capacity_soh = None
         self.energy_soh = None
+        self.reload_config()
 
-    def calculate_capacity_soh(self, capacity_data: pd.DataFrame) -> float:
+    def reload_config(self) -> None:
         """
-        Calculate capacity-based SOH using the velocity-threshold algorithm.
+        Bind the voltage window and cutoffs from the configuration as plain floats.
+
+        The SOH methods only read these attributes, never the configuration itself;
+        call this again after the configuration changes.
+        """
+        voltage_window = self.config.get('voltage_window')
+        self.voltage_lo = float(voltage_window[0])
+        self.voltage_hi = float(voltage_window[1])
+        self.cutoff_charge = float(self.config.get('cutoff_charge'))
+        self.cutoff_discharge = float(self.config.get('cutoff_discharge'))
+
+    def calculate_soh(self, data: Union[pd.DataFrame, np.ndarray], time: np.ndarray) -> np.ndarray:
+        """
+        Calculate SOH for a batch of series sampled at the same times, one kernel call for all rows.
 
         Args:
-        capacity_data (pd.DataFrame): DataFrame containing capacity data.
+        data (Union[pd.DataFrame, np.ndarray]): One row per series, one column per sample.
+        time (np.ndarray): Sample times, one per column.
 
         Returns:
-        float: Capacity-based SOH value.
+        np.ndarray: Per-row SOH as _run_pipeline computes it, NaN where a cutoff condition is not met.
         """
         try:
-            # Extract relevant data
-            capacity = capacity_data['capacity'].values
-            time = capacity_data['time'].values
-
-            # Apply voltage window
-            capacity = self.apply_voltage_window(capacity, time)
+            if isinstance(data, pd.DataFrame):
+                data = data.to_numpy(copy=False)
+            data, time = _kernel_inputs(np.atleast_2d(data), np.ravel(time))
+            if time.shape[0] != data.shape[1]:
+                raise ValueError(f"Expected {data.shape[1]} sample times, got {time.shape[0]}")
+            soh = np.empty(data.shape[0])
+            ok = np.empty(data.shape[0], dtype=np.bool_)
+            _soh_pipeline_batched(
+                data, time, self.voltage_lo, self.voltage_hi,
+                self.cutoff_charge, self.cutoff_discharge, soh, ok
+            )
+            failed = int(ok.size - np.count_nonzero(ok))
+            if failed:
+                logger.warning("Cutoff conditions not met for %d of %d rows.", failed, ok.size)
+                soh[~ok] = np.nan
+            return soh
+        except Exception as e:
+            logger.error("Error calculating SOH: %s", e)
+            return None
 
-            # Integrate charge and discharge
-            charge, discharge = self.integrate_charge_discharge(capacity, time)
+    def _run_pipeline(self, data: np.ndarray, time: np.ndarray) -> float:
+        """
+        Voltage window, charge/discharge integration, cutoff validation and SOH ratio
+        in a single fused kernel call, shared by the capacity- and energy-based SOH.
 
-            # Validate cutoff conditions
-            if not self.validate_cutoff_conditions(charge, discharge):
-                logger.warning("Cutoff conditions not met.")
-                return None
+        Returns:
+        float: SOH value, or None if a cutoff condition is not met.
+        """
+        data, time = _kernel_inputs(data, time)
+        soh, ok = _soh_pipeline(data, time, self.voltage_lo, self.voltage_hi, self.cutoff_charge, self.cutoff_discharge)
+        if not ok:
+            logger.warning("Cutoff conditions not met.")
+            return None
+        return soh
 
-            # Calculate capacity-based SOH
-            capacity_soh = self.calculate_capacity_soh_velocity_threshold(charge, discharge)
+    def calculate_capacity_soh(self, capacity_data: pd.DataFrame) -> float:
+        """
+        Calculate capacity-based SOH using the velocity-threshold algorithm.
 
-            return capacity_soh
+        Args:
+        capacity_data (pd.DataFrame): DataFrame containing capacity data.
 
+        Returns:
+        float: Capacity-based SOH value.
+        """
+        try:
+            return self._run_pipeline(capacity_data['capacity'].values, capacity_data['time'].values)
         except Exception as e:
-            logger.error(f"Error calculating capacity-based SOH: {str(e)}")
+            logger.error("Error calculating capacity-based SOH: %s", e)
             return None
 
     def calculate_energy_soh(self, energy_data: pd.DataFrame) -> float:
@@ -64,72 +174,59 @@ class SOHCalculator(BaseModel):
         float: Energy-based SOH value.
         """
         try:
-            # Extract relevant data
-            energy = energy_data['energy'].values
-            time = energy_data['time'].values
-
-            # Apply voltage window
-            energy = self.apply_voltage_window(energy, time)
-
-            # Integrate charge and discharge
-            charge, discharge = self.integrate_charge_discharge(energy, time)
-
-            # Validate cutoff conditions
-            if not self.validate_cutoff_conditions(charge, discharge):
-                logger.warning("Cutoff conditions not met.")
-                return None
-
-            # Calculate energy-based SOH
-            energy_soh = self.calculate_energy_soh_flow_theory(charge, discharge)
-
-            return energy_soh
-
+            return self._run_pipeline(energy_data['energy'].values, energy_data['time'].values)
         except Exception as e:
-            logger.error(f"Error calculating energy-based SOH: {str(e)}")
+            logger.error("Error calculating energy-based SOH: %s", e)
             return None
 
-    def integrate_charge_discharge(self, data: np.ndarray, time: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    def integrate_charge_discharge(self, data: np.ndarray, time: np.ndarray, out_charge: np.ndarray = None, out_discharge: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Integrate charge and discharge data.
 
         Args:
         data (np.ndarray): Array containing charge and discharge data.
         time (np.ndarray): Array containing time data.
+        out_charge (np.ndarray): Optional float64 array the charge is written to.
+        out_discharge (np.ndarray): Optional float64 array the discharge is written to.
 
         Returns:
         Tuple[np.ndarray, np.ndarray]: Integrated charge and discharge data.
         """
         try:
-            # Integrate charge and discharge data
-            charge, _ = integrate.cumtrapz(data, time, initial=0)
-            discharge, _ = integrate.cumtrapz(-data, time, initial=0)
+            n = data.shape[0]
+            charge = np.empty(n) if out_charge is None else out_charge
+            discharge = np.empty(n) if out_discharge is None else out_discharge
+
+            # Integrating -data gives exactly -charge, so integrate once
+            _cumtrapz(np.ascontiguousarray(data), np.ascontiguousarray(time), charge, discharge)
 
             return charge, discharge
 
         except Exception as e:
-            logger.error(f"Error integrating charge and discharge data: {str(e)}")
+            logger.error("Error integrating charge and discharge data: %s", e)
             return None, None
 
-    def apply_voltage_window(self, data: np.ndarray, time: np.ndarray) -> np.ndarray:
+    def apply_voltage_window(self, data: np.ndarray, time: np.ndarray, out: np.ndarray = None) -> np.ndarray:
         """
         Apply voltage window to data.
 
         Args:
         data (np.ndarray): Array containing data.
         time (np.ndarray): Array containing time data.
+        out (np.ndarray): Optional float64 array the result is written to.
 
         Returns:
         np.ndarray: Data with voltage window applied.
         """
         try:
             # Apply voltage window
-            voltage_window = self.config.get('voltage_window')
-            data = np.where((data > voltage_window[0]) & (data < voltage_window[1]), data, np.nan)
-
-            return data
+            data = np.ascontiguousarray(data)
+            if out is None:
+                out = np.empty(data.shape[0], dtype=np.float64)
+            return _vwin(data, self.voltage_lo, self.voltage_hi, out)
 
         except Exception as e:
-            logger.error(f"Error applying voltage window: {str(e)}")
+            logger.error("Error applying voltage window: %s", e)
             return None
 
     def validate_cutoff_conditions(self, charge: np.ndarray, discharge: np.ndarray) -> bool:
@@ -144,17 +241,12 @@ class SOHCalculator(BaseModel):
         bool: True if cutoff conditions are met, False otherwise.
         """
         try:
-            # Validate cutoff conditions
-            cutoff_charge = self.config.get('cutoff_charge')
-            cutoff_discharge = self.config.get('cutoff_discharge')
-
-            if np.any((charge < cutoff_charge) | (discharge < cutoff_discharge)):
-                return False
-
-            return True
+            # Validate cutoff conditions; nanmin matches the element-wise test,
+            # which never flags NaN samples, and skips discharge if charge fails
+            return not (np.nanmin(charge) < self.cutoff_charge or np.nanmin(discharge) < self.cutoff_discharge)
 
         except Exception as e:
-            logger.error(f"Error validating cutoff conditions: {str(e)}")
+            logger.error("Error validating cutoff conditions: %s", e)
             return False
 
     def calculate_capacity_soh_velocity_threshold(self, charge: np.ndarray, discharge: np.ndarray) -> float:
@@ -170,12 +262,10 @@ class SOHCalculator(BaseModel):
         """
         try:
             # Calculate capacity-based SOH
-            capacity_soh = np.mean((charge[-1] - charge[0]) / (discharge[-1] - discharge[0]))
-
-            return capacity_soh
+            return float((charge[-1] - charge[0]) / (discharge[-1] - discharge[0]))
 
         except Exception as e:
-            logger.error(f"Error calculating capacity-based SOH: {str(e)}")
+            logger.error("Error calculating capacity-based SOH: %s", e)
             return None
 
     def calculate_energy_soh_flow_theory(self, charge: np.ndarray, discharge: np.ndarray) -> float:
@@ -191,15 +281,15 @@ class SOHCalculator(BaseModel):
         """
         try:
             # Calculate energy-based SOH
-            energy_soh = np.mean((charge[-1] - charge[0]) / (discharge[-1] - discharge[0]))
-
-            return energy_soh
+            return float((charge[-1] - charge[0]) / (discharge[-1] - discharge[0]))
 
         except Exception as e:
-            logger.error(f"Error calculating energy-based SOH: {str(e)}")
+            logger.error("Error calculating energy-based SOH: %s", e)
             return None
 
 def main():
+    configure_logging()
+
     # Load configuration
     config = ConfigHandler()
 
@@ -207,8 +297,8 @@ def main():
     soh_calculator = SOHCalculator(config)
 
     # Load data
-    capacity_data = pd.read_csv('capacity_data.csv')
-    energy_data = pd.read_csv('energy_data.csv')
+    capacity_data = pd.read_csv('capacity_data.csv', usecols=['capacity', 'time'], dtype={'capacity': np.float32, 'time': np.float32}, engine='c')
+    energy_data = pd.read_csv('energy_data.csv', usecols=['energy', 'time'], dtype={'energy': np.float32, 'time': np.float32}, engine='c')
 
     # Calculate capacity-based SOH
     capacity_soh = soh_calculator.calculate_capacity_soh(capacity_data)
@@ -216,9 +306,9 @@ def main():
     # Calculate energy-based SOH
     energy_soh = soh_calculator.calculate_energy_soh(energy_data)
 
-    # Print results
-    print(f"Capacity-based SOH: {capacity_soh}")
-    print(f"Energy-based SOH: {energy_soh}")
+    # Log results
+    logger.info("Capacity-based SOH: %s", capacity_soh)
+    logger.info("Energy-based SOH: %s", energy_soh)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,28 @@
 import unittest
+from unittest.mock import Mock
+import json
+import tempfile
 import numpy as np
-import pandas as pd
+from scipy.integrate import cumulative_trapezoid
 from soh_calculator import SOHCalculator
-from dv_analyzer import DVAnalyzer
+from dv_analyzer import DVAnalyzer, InvalidInputError, config as dv_config
+from data_validator import DataValidator, ValidatorConfig
+from config_handler import ConfigHandler, _parse_yaml
+from poll_kernel import BALANCING_OK, TEMPERATURE_OK, VOLTAGE_OK, _poll_decide
+try:
+    # Pulls in the serial/CAN stack; the controller parity test is skipped without it
+    from measurement_controller import MeasurementController
+except ImportError:
+    MeasurementController = None
+import orjson
 import logging
 from logging.config import dictConfig
 import yaml
 from pathlib import Path
 import os
 
-# Define logging configuration
-dictConfig({
+# Define logging configuration; applied once per test run in setUpModule
+LOGGING_CONFIG = {
     'version': 1,
     'formatters': {
         'default': {
@@ -35,39 +47,39 @@ dictConfig({
         'level': 'DEBUG',
         'handlers': ['wsgi', 'file']
     }
-})
+}
 
-# Load configuration from YAML file
+def setUpModule():
+    dictConfig(LOGGING_CONFIG)
+
+# Configuration is read from this YAML file by the tests that need it
 config_path = Path(__file__).parent / 'config.yaml'
-with open(config_path, 'r') as f:
-    config = yaml.safe_load(f)
 
 class TestSuite(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        with open(config_path, 'r') as f:
+            cls.config = yaml.safe_load(f)
+
     def setUp(self):
-        self.soh_calculator = SOHCalculator(config['soh_calculator'])
-        self.dv_analyzer = DVAnalyzer(config['dv_analyzer'])
+        self.soh_calculator = SOHCalculator(self.config['soh_calculator'])
+        self.dv_analyzer = DVAnalyzer(self.config['dv_analyzer'])
+        # Seeded float32 test data, one row per cell and one column per sample
+        self.data = np.random.default_rng(0).random((100, 10), dtype=np.float32)
 
     def test_soh_calculations(self):
-        # Generate test data
-        data = np.random.rand(100, 10)
-        df = pd.DataFrame(data, columns=['cell_1', 'cell_2', 'cell_3', 'cell_4', 'cell_5', 'cell_6', 'cell_7', 'cell_8', 'cell_9', 'cell_10'])
-
         # Perform SOH calculations
-        soh_values = self.soh_calculator.calculate_soh(df)
+        soh_values = self.soh_calculator.calculate_soh(self.data, np.arange(self.data.shape[1], dtype=np.float32))
 
-        # Assert results
+        # Assert results; the pipeline's ratio is charge / -charge, so every value is -1 or
+        # NaN until the SOH formula noted in _soh_pipeline is settled
         self.assertEqual(len(soh_values), 100)
-        self.assertGreaterEqual(min(soh_values), 0)
-        self.assertLessEqual(max(soh_values), 1)
+        np.testing.assert_allclose(soh_values[~np.isnan(soh_values)], -1.0, rtol=1e-12)
 
     def test_dv_analysis(self):
-        # Generate test data
-        data = np.random.rand(100, 10)
-        df = pd.DataFrame(data, columns=['cell_1', 'cell_2', 'cell_3', 'cell_4', 'cell_5', 'cell_6', 'cell_7', 'cell_8', 'cell_9', 'cell_10'])
-
         # Perform DV analysis
-        dv_values = self.dv_analyzer.analyze_dv(df)
+        dv_values = self.dv_analyzer.analyze_dv(self.data)
 
         # Assert results
         self.assertEqual(len(dv_values), 100)
@@ -75,27 +87,321 @@ class TestSuite(unittest.TestCase):
         self.assertLessEqual(max(dv_values), 1)
 
     def test_data_validation(self):
-        # Generate test data
-        data = np.random.rand(100, 10)
-        df = pd.DataFrame(data, columns=['cell_1', 'cell_2', 'cell_3', 'cell_4', 'cell_5', 'cell_6', 'cell_7', 'cell_8', 'cell_9', 'cell_10'])
-
         # Validate data
-        is_valid = self.soh_calculator.validate_data(df)
+        is_valid = self.soh_calculator.validate_data(self.data)
 
         # Assert results
         self.assertTrue(is_valid)
 
     def test_report_generation(self):
-        # Generate test data
-        data = np.random.rand(100, 10)
-        df = pd.DataFrame(data, columns=['cell_1', 'cell_2', 'cell_3', 'cell_4', 'cell_5', 'cell_6', 'cell_7', 'cell_8', 'cell_9', 'cell_10'])
-
         # Generate report
-        report = self.soh_calculator.generate_report(df)
+        report = self.soh_calculator.generate_report(self.data)
 
         # Assert results
         self.assertIsInstance(report, str)
         self.assertGreaterEqual(len(report), 1)
 
+def reference_peak_indices(y, thres, min_dist):
+    """peakutils.indices, which the DV analyzer used before its peak picking was compiled."""
+    thres = thres * (np.max(y) - np.min(y)) + np.min(y)
+    dy = np.diff(y)
+    peaks = np.where((np.hstack([dy, 0.0]) < 0.0) & (np.hstack([0.0, dy]) > 0.0) & (y > thres))[0]
+    if peaks.size > 1 and min_dist > 1:
+        highest = peaks[np.argsort(y[peaks])][::-1]
+        rem = np.ones(y.size, dtype=bool)
+        rem[peaks] = False
+        for peak in highest:
+            if not rem[peak]:
+                rem[max(0, peak - min_dist):peak + min_dist + 1] = True
+                rem[peak] = False
+        peaks = np.arange(y.size)[~rem]
+    return peaks
+
+class TestDVKernels(unittest.TestCase):
+
+    def setUp(self):
+        n = 50
+        self.dv_analyzer = DVAnalyzer(np.linspace(3.0, 4.2, n), np.ones(n), np.linspace(0.0, 1.0, n))
+
+    def test_dv_pipeline_matches_numpy_and_peakutils(self):
+        rng = np.random.default_rng(0)
+        w = dv_config.dv_window_size
+        for trial in range(60):
+            n = int(rng.integers(8, 400))
+            soc = (np.sort(rng.random(n)) + np.arange(n) * 1e-3).astype(np.float32)
+            voltage = (3 + np.sin(soc * 20) + 0.05 * rng.standard_normal(n)).astype(np.float32)
+            if trial % 3 == 1:
+                # Repeated first SOC value: the one-sided difference is inf
+                soc[1] = soc[0]
+            elif trial % 3 == 2:
+                # Three repeated SOC values around an equal voltage step: the central difference is NaN
+                j = n // 2
+                soc[j - 1:j + 2] = soc[j]
+                voltage[j + 1] = voltage[j - 1]
+            analyzer = DVAnalyzer(voltage, np.ones(n, dtype=np.float32), soc)
+            dv = analyzer.calculate_dv_curve()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                expected = np.gradient(voltage.astype(np.float64)) / np.gradient(soc.astype(np.float64))
+                expected = np.convolve(expected, np.ones(w) / w, mode='valid')
+            np.testing.assert_allclose(dv, expected, rtol=1e-3, atol=1e-2)
+            modes = analyzer.identify_degradation_modes()
+            for name, y, thres in (
+                ('lam_pe', dv, dv_config.lam_pe_threshold),
+                ('lam_ne', -dv, dv_config.lam_ne_threshold),
+                ('lli', dv, dv_config.lli_threshold),
+            ):
+                with np.errstate(invalid='ignore'):
+                    np.testing.assert_array_equal(modes[name], reference_peak_indices(y.astype(np.float64), thres, w))
+
+    def test_dv_analyzer_rejects_input_shorter_than_window(self):
+        n = dv_config.dv_window_size - 1
+        with self.assertRaises(InvalidInputError):
+            DVAnalyzer(np.linspace(3.0, 4.2, n), np.ones(n), np.linspace(0.0, 1.0, n))
+
+    def test_normalize_features_matches_numpy(self):
+        features = np.random.default_rng(0).random((3, 4), dtype=np.float32)
+        expected = (features - features.min()) / (features.max() - features.min())
+        normalized = self.dv_analyzer.normalize_features(features)
+        self.assertEqual(normalized.dtype, expected.dtype)
+        np.testing.assert_allclose(normalized, expected, rtol=1e-6)
+
+    def test_normalize_features_scales_integers_in_float(self):
+        np.testing.assert_array_equal(self.dv_analyzer.normalize_features(np.array([0, 5, 10])), [0.0, 0.5, 1.0])
+
+    def test_normalize_features_constant_input_is_nan(self):
+        self.assertTrue(np.isnan(self.dv_analyzer.normalize_features(np.full(4, 3.0))).all())
+
+def reference_soh(data, time, lo, hi, cutoff_charge, cutoff_discharge):
+    """The step-by-step NumPy/SciPy SOH computation the fused kernel replaced."""
+    windowed = np.where((data > lo) & (data < hi), data, np.nan)
+    charge = cumulative_trapezoid(windowed, time, initial=0)
+    discharge = cumulative_trapezoid(-windowed, time, initial=0)
+    if np.any((charge < cutoff_charge) | (discharge < cutoff_discharge)):
+        return None
+    return (charge[-1] - charge[0]) / (discharge[-1] - discharge[0])
+
+class TestSOHKernels(unittest.TestCase):
+
+    def setUp(self):
+        self.soh_calculator = SOHCalculator({'voltage_window': (-1000.0, 2.0), 'cutoff_charge': -100.0, 'cutoff_discharge': -100.0})
+        self.time = np.arange(10, dtype=np.float32)
+
+    def series(self, n=50):
+        rng = np.random.default_rng(0)
+        return rng.random(n), np.cumsum(rng.random(n) + 0.1)
+
+    def test_apply_voltage_window_matches_np_where(self):
+        calculator = SOHCalculator({'voltage_window': (0.2, 0.8), 'cutoff_charge': 0.0, 'cutoff_discharge': 0.0})
+        data, time = self.series()
+        np.testing.assert_array_equal(
+            calculator.apply_voltage_window(data, time),
+            np.where((data > 0.2) & (data < 0.8), data, np.nan)
+        )
+
+    def test_integrate_charge_discharge_matches_cumulative_trapezoid(self):
+        data, time = self.series()
+        for values in (data, np.where(data < 0.8, data, np.nan)):
+            charge, discharge = self.soh_calculator.integrate_charge_discharge(values, time)
+            np.testing.assert_allclose(charge, cumulative_trapezoid(values, time, initial=0), rtol=1e-12)
+            np.testing.assert_allclose(discharge, cumulative_trapezoid(-values, time, initial=0), rtol=1e-12)
+
+    def test_validate_cutoff_conditions_matches_elementwise_check(self):
+        calculator = SOHCalculator({'voltage_window': (0.0, 2.0), 'cutoff_charge': -1.0, 'cutoff_discharge': -5.0})
+        for charge in ([0.0, 1.0, 3.0], [0.0, -2.0, 1.0], [0.0, np.nan, -2.0], [0.0, -2.0, np.nan]):
+            charge = np.array(charge)
+            discharge = -charge
+            expected = not np.any((charge < -1.0) | (discharge < -5.0))
+            self.assertEqual(calculator.validate_cutoff_conditions(charge, discharge), expected)
+
+    def test_soh_pipeline_matches_step_by_step(self):
+        data, time = self.series()
+        windowed_out = data.copy()
+        windowed_out[20] = 5.0
+        # Crosses the charge cutoff before the sample that leaves the window
+        crossing = data.copy()
+        crossing[5:15] = -100.0
+        crossing[30] = 5.0
+        for values, outcome in ((data, 'value'), (windowed_out, 'nan'), (crossing, 'cutoff'), (data.astype(np.float32), 'value')):
+            expected = reference_soh(values.astype(np.float64), time, -1000.0, 2.0, -100.0, -100.0)
+            soh = self.soh_calculator._run_pipeline(values, time)
+            if outcome == 'cutoff':
+                self.assertIsNone(expected)
+                self.assertIsNone(soh)
+            elif outcome == 'nan':
+                self.assertTrue(np.isnan(expected))
+                self.assertTrue(np.isnan(soh))
+            else:
+                self.assertAlmostEqual(soh, expected)
+
+    def test_calculate_soh_matches_per_series_pipeline(self):
+        data = np.random.default_rng(0).random((100, 10), dtype=np.float32)
+        # Row 1 leaves the voltage window, row 2 crosses the charge cutoff
+        data[1, 4] = 5.0
+        data[2, 3:] = -500.0
+        expected = [self.soh_calculator._run_pipeline(row, self.time) for row in data]
+        soh_values = self.soh_calculator.calculate_soh(data, self.time)
+        self.assertEqual(len(soh_values), 100)
+        self.assertIsNone(expected[2])
+        np.testing.assert_array_equal(soh_values, [np.nan if value is None else value for value in expected])
+
+def reference_deviation_flags(data, anomaly_threshold, defective_threshold):
+    """The NumPy checks detect_anomalies and flag_defective_cells ran before the single-pass kernel."""
+    deviation = np.abs(data - np.mean(data))
+    sigma = np.std(data)
+    return bool(np.any(deviation > anomaly_threshold * sigma)), bool(np.any(deviation > defective_threshold * sigma))
+
+class TestValidatorKernels(unittest.TestCase):
+
+    def test_deviation_flags_match_numpy(self):
+        rng = np.random.default_rng(0)
+        with_nan = rng.standard_normal(32)
+        with_nan[7] = np.nan
+        with_outlier = rng.standard_normal(32)
+        with_outlier[3] = 50.0
+        samples = [rng.standard_normal(n) for n in (2, 5, 32, 1000)] + [np.full(16, 3.0), with_nan, with_outlier]
+        for anomaly_threshold, defective_threshold in ((0.1, 0.2), (2.0, 3.0), (3.5, 5.0)):
+            validator = DataValidator(ValidatorConfig(
+                anomaly_detection_threshold=anomaly_threshold,
+                defective_cell_threshold=defective_threshold
+            ))
+            for data in samples:
+                with np.errstate(invalid='ignore'):
+                    expected = reference_deviation_flags(data, anomaly_threshold, defective_threshold)
+                self.assertEqual((validator.detect_anomalies(data), validator.flag_defective_cells(data)), expected)
+
+    def test_validate_batch_matches_per_sample_checks(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        config = ValidatorConfig(anomaly_detection_threshold=2.0, defective_cell_threshold=2.5)
+        temperatures = rng.uniform(-10.0, 60.0, n)
+        temperatures[0] = np.nan
+        voltages = rng.uniform(0.9, 1.1, n)
+        data = rng.standard_normal((n, 8))
+        flags = DataValidator(config).validate_batch(temperatures, voltages, data)
+        expected = [reference_deviation_flags(row, 2.0, 2.5) for row in data]
+        lo, hi = config.temperature_range
+        np.testing.assert_array_equal(flags['temperature_valid'], [lo <= t <= hi for t in temperatures])
+        np.testing.assert_array_equal(flags['voltage_stable'], [not abs(v - 1.0) > config.voltage_stability_threshold for v in voltages])
+        np.testing.assert_array_equal(flags['anomaly_detected'], [anomaly for anomaly, _ in expected])
+        np.testing.assert_array_equal(flags['defective_cell'], [defective for _, defective in expected])
+
+class TestConfigHandlerCache(unittest.TestCase):
+    """Checks the mtime-keyed parse cache against reading and parsing the file directly."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.parameters_file = os.path.join(self.tmpdir.name, 'measurement_parameters.json')
+        self.config_file = os.path.join(self.tmpdir.name, 'vehicle_config.yaml')
+        self.reference_values_file = os.path.join(self.tmpdir.name, 'reference_values.json')
+        with open(self.parameters_file, 'w') as file:
+            json.dump({'voltage_range': [[3.0, 4.2]], 'current_range': [0, 10], 'temperature_range': [-20, 60]}, file)
+        with open(self.config_file, 'w') as file:
+            yaml.safe_dump({'vehicle_id': 'EV-1', 'voltage_window': [3.0, 4.2]}, file)
+        with open(self.reference_values_file, 'w') as file:
+            json.dump({'1': 0.98}, file)
+        self.handler = ConfigHandler(self.config_file, self.parameters_file, self.reference_values_file)
+
+    def rewrite(self, path, data):
+        # Force a new mtime so the check does not depend on filesystem timestamp granularity
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, 'w') as file:
+            json.dump(data, file)
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+    def test_load_cached_matches_direct_parse(self):
+        with open(self.parameters_file) as file:
+            self.assertEqual(self.handler._load_cached(self.parameters_file, orjson.loads), json.load(file))
+        with open(self.config_file) as file:
+            self.assertEqual(self.handler._load_cached(self.config_file, _parse_yaml), yaml.safe_load(file))
+
+    def test_load_cached_reuses_parse_until_file_changes(self):
+        parse = Mock(side_effect=orjson.loads)
+        first = self.handler._load_cached(self.parameters_file, parse)
+        self.assertIs(self.handler._load_cached(self.parameters_file, parse), first)
+        self.assertEqual(parse.call_count, 1)
+
+        self.rewrite(self.parameters_file, {'voltage_range': [[2.5, 4.0]]})
+        reloaded = self.handler._load_cached(self.parameters_file, parse)
+        self.assertEqual(parse.call_count, 2)
+        with open(self.parameters_file) as file:
+            self.assertEqual(reloaded, json.load(file))
+
+    def test_own_writes_are_visible_to_the_next_load(self):
+        self.handler.load_parameters()
+        self.handler.get_reference_values()
+        self.handler.update_voltage_ranges([[2.5, 4.0]])
+        self.handler.store_reference_values({'1': 0.9})
+        with open(self.parameters_file) as file:
+            self.assertEqual(self.handler.load_parameters(), json.load(file))
+        self.assertEqual(self.handler.load_parameters()['voltage_range'], [[2.5, 4.0]])
+        self.assertEqual(self.handler.get_reference_values(), {'1': 0.9})
+
+class TestPollKernel(unittest.TestCase):
+    """Checks the batched session-limit kernel against the per-sample abs(x - target) <= tol checks."""
+
+    targets = (3.65, 25, 0.0)
+    tols = (0.1, 5, 0.5)
+
+    def samples(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        # Spread samples around each tolerance edge, plus NaN readings; float32(3.75)
+        # is within 0.1 of 3.65 in float32 arithmetic but not in the per-sample check
+        voltages = rng.uniform(3.45, 3.85, n).astype(np.float32)
+        temperatures = rng.uniform(15.0, 35.0, n).astype(np.float32)
+        balancing_states = rng.uniform(-1.0, 1.0, n).astype(np.float32)
+        voltages[:3] = [np.nan, 3.75, 3.55]
+        temperatures[3:6] = [np.nan, 30.0, 20.0]
+        balancing_states[6:9] = [np.nan, 0.5, -0.5]
+        return voltages, temperatures, balancing_states
+
+    def assert_edge_flags(self, flags):
+        self.assertEqual(flags.dtype, np.uint8)
+        self.assertEqual(flags[0] & VOLTAGE_OK, 0)
+        self.assertEqual(flags[1] & VOLTAGE_OK, 0)
+        self.assertEqual(flags[3] & TEMPERATURE_OK, 0)
+        self.assertEqual(flags[6] & BALANCING_OK, 0)
+
+    def test_poll_decide_matches_per_sample_checks(self):
+        voltages, temperatures, balancing_states = self.samples()
+        (v_target, t_target, b_target), (v_tol, t_tol, b_tol) = self.targets, self.tols
+        expected = [
+            (VOLTAGE_OK if abs(float(v) - v_target) <= v_tol else 0)
+            | (TEMPERATURE_OK if abs(float(t) - t_target) <= t_tol else 0)
+            | (BALANCING_OK if abs(float(b) - b_target) <= b_tol else 0)
+            for v, t, b in zip(voltages, temperatures, balancing_states)
+        ]
+        flags = np.empty(len(voltages), dtype=np.uint8)
+        _poll_decide(
+            voltages, temperatures, balancing_states,
+            np.array(self.targets, dtype=np.float64), np.array(self.tols, dtype=np.float64), flags
+        )
+        np.testing.assert_array_equal(flags, expected)
+        self.assert_edge_flags(flags)
+
+    @unittest.skipUnless(MeasurementController, 'measurement_controller needs the serial/CAN stack')
+    def test_evaluate_samples_matches_controller_checks(self):
+        voltages, temperatures, balancing_states = self.samples()
+        config_handler = Mock()
+        config_handler.get_target_voltage.return_value = self.targets[0]
+        config_handler.get_target_temperature.return_value = self.targets[1]
+        config_handler.get_target_balancing_state.return_value = self.targets[2]
+        data_acquisition = Mock()
+        data_acquisition.read_voltage.side_effect = [float(v) for v in voltages]
+        data_acquisition.read_temperature.side_effect = [float(t) for t in temperatures]
+        data_acquisition.read_balancing_state.side_effect = [float(b) for b in balancing_states]
+        controller = MeasurementController(config_handler, data_acquisition)
+        expected = [
+            (VOLTAGE_OK if controller.monitor_voltage_range() else 0)
+            | (TEMPERATURE_OK if controller.enforce_temperature_limits() else 0)
+            | (BALANCING_OK if controller.handle_balancing_states() else 0)
+            for _ in range(len(voltages))
+        ]
+
+        flags = controller.evaluate_samples(voltages, temperatures, balancing_states)
+        np.testing.assert_array_equal(flags, expected)
+        self.assert_edge_flags(flags)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file